@@ -1,8 +1,7 @@
 import streamlit as st
-import os
 
 # Importa os módulos
-from modules import data, utils, views, home
+from modules import analytics, assets, data, instrumentacao, preaquecimento, views, home
 
 # 1. Configuração da Página
 st.set_page_config(page_title="Cartolendários", page_icon="🎩", layout="wide")
@@ -47,11 +46,12 @@ def executar_sistema():
     # 1. SIDEBAR - TOPO (Logo + Navegação)
     # ==========================================
     with st.sidebar:
-        if os.path.exists("logo.png"):
+        logo = assets.imagem("logo.png", 400)  # Reduzida uma vez por processo
+        if logo:
             # Colunas [1, 4, 1] para aumentar logo (4 partes) e centralizar
             sb_c1, sb_c2, sb_c3 = st.columns([1, 4, 1]) 
             with sb_c2:
-                st.image("logo.png", use_container_width=True)
+                st.image(logo, use_container_width=True)
         else:
             st.header("🎩 Cartolendários")
         
@@ -77,18 +77,82 @@ def executar_sistema():
 
         senha = st.text_input("Senha:", type="password")
         up_camp, up_esc = None, None
+        up_delta, aplicar_delta, descartar_delta = None, False, False
+        painel_instrumentacao = None
         
         if senha == SENHA_ADMIN:
             st.success("Admin Ativado 🔓")
             up_camp = st.file_uploader("Jogos", type=["xlsx", "csv"], key="u1")
             up_esc = st.file_uploader("Escalações", type=["xlsx", "csv"], key="u2")
 
+            # Nova rodada/temporada: entra por cima dos arquivos padrão e fica gravada
+            up_delta = st.file_uploader("Nova rodada ou temporada (delta)", type=["xlsx", "csv"], key="u3")
+            tipo_delta = st.radio("O delta é de", ["Jogos", "Escalações"], horizontal=True, key="tipo_delta")
+            col_aplicar, col_descartar = st.columns(2)
+            aplicar_delta = col_aplicar.button("➕ Aplicar delta", disabled=up_delta is None)
+            descartar_delta = col_descartar.button("🗑️ Descartar delta", help="Apaga o delta gravado do tipo escolhido")
+            info_delta = st.empty()
+            info_cache = st.empty()
+
+            # Instrumentação do caminho quente (vale para o processo todo, não só para esta sessão)
+            instrumentar = st.toggle("⏱️ Instrumentação", value=instrumentacao.ativa())
+            medir_memoria = st.toggle("Medir memória (mais lento)", value=instrumentacao.medindo_memoria(),
+                                      disabled=not instrumentar)
+            instrumentacao.ativar(instrumentar, medir_memoria)
+            painel_instrumentacao = st.container()
+
     # --- CARGA DE DADOS ---
     ARQUIVO_PADRAO = "dados_campeonato.xlsx"
     ARQUIVO_ESCALACOES = "dados_escalacoes.xlsx"
 
-    df_camp = data.carregar_arquivo(up_camp) if up_camp else data.carregar_arquivo(ARQUIVO_PADRAO)
-    df_esc = data.carregar_arquivo(up_esc) if up_esc else data.carregar_arquivo(ARQUIVO_ESCALACOES)
+    if aplicar_delta or descartar_delta:
+        arquivo_delta, padronizar_delta = (ARQUIVO_PADRAO, data.padronizar_campeonato) if tipo_delta == "Jogos" \
+            else (ARQUIVO_ESCALACOES, data.padronizar_escalacoes)
+    if aplicar_delta:
+        base_delta, motivo = data.aplicar_delta(arquivo_delta, data.carregar_delta(up_delta, padronizar_delta),
+                                                padronizar_delta)
+        if base_delta is None:
+            info_delta.error(f"Não foi possível aplicar o delta: {motivo}.")
+        else:
+            info_delta.success(f"Delta aplicado: {len(base_delta)} linhas na base.")
+    elif descartar_delta:
+        if data.descartar_deltas(arquivo_delta):
+            info_delta.success(f"Delta de {tipo_delta.lower()} descartado.")
+        else:
+            info_delta.info(f"Não há delta de {tipo_delta.lower()} gravado.")
+
+    # Uploads entram pelo cache de versões; arquivos padrão vêm da base compartilhada do processo (ambos já padronizados).
+    # As escalações só são carregadas quando a aba 3 está aberta.
+    if up_camp:
+        df_camp = data.carregar_upload(up_camp, data.padronizar_campeonato)
+    else:
+        df_camp = data.carregar_base(ARQUIVO_PADRAO, data.padronizar_campeonato)
+
+    # Pré-cálculo em segundo plano das abas com os filtros padrão (uma vez por versão de cada base)
+    preaquecimento.agendar(df_camp)
+    if up_esc:
+        preaquecimento.agendar_carga(('upload', up_esc.file_id),
+                                     lambda: data.carregar_upload(up_esc, data.padronizar_escalacoes),
+                                     preaquecimento.preaquecer_escalacoes)
+    else:
+        preaquecimento.agendar_carga((ARQUIVO_ESCALACOES, data.versao_base(ARQUIVO_ESCALACOES)),
+                                     lambda: data.carregar_base(ARQUIVO_ESCALACOES, data.padronizar_escalacoes),
+                                     preaquecimento.preaquecer_escalacoes)
+
+    if senha == SENHA_ADMIN:
+        stats = data.estatisticas_uploads()
+        stats_analises = analytics.estatisticas()
+        stats_preaquecimento = preaquecimento.estado()
+        info_cache.caption(
+            f"📦 Cache de uploads: {stats['itens']}/{stats['max_itens']} versões · "
+            f"{stats['bytes'] / 1024 ** 2:.1f}/{stats['max_bytes'] / 1024 ** 2:.0f} MB · "
+            f"{stats['hits']} hits / {stats['misses']} misses  \n"
+            f"🧮 Cache de análises: {stats_analises['itens']}/{stats_analises['max_itens']} resultados · "
+            f"{stats_analises['bytes'] / 1024 ** 2:.1f}/{stats_analises['max_bytes'] / 1024 ** 2:.0f} MB · "
+            f"{stats_analises['hits']} hits / {stats_analises['misses']} misses  \n"
+            f"🔥 Pré-cálculo: {stats_preaquecimento['pendentes']} pendentes · "
+            f"{stats_preaquecimento['concluidas']} concluídos · {stats_preaquecimento['erros']} erros"
+        )
 
     if df_camp is None:
         st.sidebar.warning("⚠️ Aguardando dados.")
@@ -96,30 +160,31 @@ def executar_sistema():
         st.info("Por favor, carregue os dados na barra lateral.")
         st.stop()
 
-    df_camp = data.padronizar_campeonato(df_camp)
-    df_esc = data.padronizar_escalacoes(df_esc)
-
     # --- FILTROS VISUAIS ---
+    # A base vem ordenada por Temporada/Competição/Rodada: as opções e recortes
+    # saem do índice de blocos (analytics.indice), sem varrer nem copiar a base.
+    indice_camp = analytics.indice(df_camp)
+
     # Temporada
-    anos = sorted(df_camp['Temporada'].unique(), reverse=True)
+    anos = sorted(indice_camp.keys(), reverse=True)
     sel_temp = st.sidebar.selectbox("📅 Temporada:", anos)
-    df_c_temp = df_camp[df_camp['Temporada'] == sel_temp].copy()
 
     # Competição
-    comps = sorted([c for c in df_c_temp['Competição'].unique()])
+    comps = sorted([c for c in indice_camp[sel_temp].keys()])
     opcoes_comp = ["Todas"] + comps
     sel_comp = st.sidebar.selectbox("🏆 Competição (Abas 1-3):", opcoes_comp)
-    df_c_comp = df_c_temp if sel_comp == "Todas" else df_c_temp[df_c_temp['Competição'] == sel_comp].copy()
 
     # Validação de Dados
-    if df_c_comp.empty or 'Rodada' not in df_c_comp.columns or df_c_comp['Rodada'].isnull().all():
+    rodadas_comp = analytics.rodadas(df_camp, sel_temp, None if sel_comp == "Todas" else sel_comp)
+    if len(rodadas_comp) == 0:
         st.title("🎩 Área de Competidores")
         st.sidebar.warning("Sem dados para os filtros selecionados.")
         st.warning(f"A bola ainda não rolou por aqui na temporada **{sel_temp}**.")
         st.stop()
 
     # Slider de Rodadas
-    mi, ma = int(df_c_temp['Rodada'].min()), int(df_c_temp['Rodada'].max())
+    rodadas_temp = analytics.rodadas(df_camp, sel_temp)
+    mi, ma = int(rodadas_temp[0]), int(rodadas_temp[-1])
     if mi == ma:
         r_ini, r_fim = mi, ma
         st.sidebar.info(f"Rodada Única: {mi}")
@@ -146,52 +211,82 @@ def executar_sistema():
     # ==========================================
     st.title("🎩 Área de Competidores")
 
-    df_c_final = df_c_comp[(df_c_comp['Rodada'] >= r_ini) & (df_c_comp['Rodada'] <= r_fim)].copy()
-    
-    # Processamento
-    df_res = utils.processar_jogos(df_c_final)
-    df_lendas_geral, df_lendas_ligas = utils.gerar_ranking_lendas(df_camp, sel_temp, r_ini, r_fim)
+    # Processamento: modules.analytics memoriza cada resultado pela base e pelos
+    # filtros, então widgets que não mudam os filtros não recalculam nada
+    comp_filtro = None if sel_comp == "Todas" else sel_comp
 
-    # Abas
-    tab1, tab2, tab3, tab4 = st.tabs(["📊 Tabela da Liga", "🔎 Raio-X do Time", "👕 Top Escalações", "🏅 Lendas"])
+    # Abas com estado: só a aba aberta é calculada e desenhada (trocar de aba dispara um rerun)
+    tab1, tab2, tab3, tab4 = st.tabs(["📊 Tabela da Liga", "🔎 Raio-X do Time", "👕 Top Escalações", "🏅 Lendas"],
+                                     key="aba_principal", on_change="rerun")
 
-    with tab1:
-        views.exibir_tabela_liga(df_res, sel_comp)
+    if tab1.open:
+        with tab1:
+            tb_liga = analytics.classificacao(df_camp, sel_temp, comp_filtro, r_ini, r_fim)
+            views.exibir_tabela_liga(tb_liga, sel_comp)
 
-    with tab2:
-        views.exibir_raio_x(df_res)
-        try:
-            t_disp = sorted(df_res['Time'].unique())
-            t_padrao = t_disp[0] if t_disp else ""
-        except:
-            t_padrao = ""
-
-    with tab3:
-        if df_esc is None or df_esc.empty:
-            st.info("Arquivo de escalações não carregado.")
-        else:
-            df_esc_temp = df_esc[df_esc['Temporada'] == sel_temp].copy()
-            if df_esc_temp.empty:
-                st.warning(f"Sem escalações para {sel_temp}.")
+    if tab2.open:
+        with tab2:
+            raio_x = analytics.raio_x(df_camp, sel_temp, comp_filtro, r_ini, r_fim)
+            views.exibir_raio_x(raio_x)
+
+    if tab3.open:
+        with tab3:
+            if up_esc:
+                df_esc = data.carregar_upload(up_esc, data.padronizar_escalacoes)
             else:
-                if 'Rodada' in df_esc_temp.columns:
-                    lista_rodadas = sorted(df_esc_temp['Rodada'].unique().astype(int))
-                    st.markdown("##### 🕵️ Filtro de Rodada (Aba 3)")
-                    c_drop, _ = st.columns([1, 2])
-                    with c_drop:
-                        rodada_escolhida = st.selectbox("Escolha:", lista_rodadas, index=len(lista_rodadas) - 1)
-
-                    df_esc_final = utils.filtrar_escalacoes(df_esc_temp, sel_temp, rodada_escolhida, rodada_escolhida)
-                    views.exibir_top_escalacoes(df_esc_final, t_padrao)
+                df_esc = data.carregar_base(ARQUIVO_ESCALACOES, data.padronizar_escalacoes)
+
+            # Time em foco padrão: o primeiro da janela em ordem alfabética, como no Raio-X.
+            # Sai da classificação (barata) para não calcular o Raio-X com a aba fechada.
+            tb_liga = analytics.classificacao(df_camp, sel_temp, comp_filtro, r_ini, r_fim)
+            t_padrao = min(tb_liga['Time']) if not tb_liga.empty else ""
+
+            if df_esc is None or df_esc.empty:
+                st.info("Arquivo de escalações não carregado.")
+            else:
+                if sel_temp not in analytics.indice(df_esc):
+                    st.warning(f"Sem escalações para {sel_temp}.")
                 else:
-                    st.warning("Coluna 'Rodada' ausente.")
+                    if 'Rodada' in df_esc.columns:
+                        lista_rodadas = [int(r) for r in analytics.rodadas(df_esc, sel_temp)]
+                        st.markdown("##### 🕵️ Filtro de Rodada (Aba 3)")
+                        c_drop, _ = st.columns([1, 2])
+                        with c_drop:
+                            rodada_escolhida = views.selecao_persistente(
+                                "Escolha:", lista_rodadas, 'sel_escalacoes_rodada', index=len(lista_rodadas) - 1)
+
+                        # O painel de cada rodada é calculado uma vez sobre o cubo de contagens
+                        painel = analytics.top_escalacoes(df_esc, sel_temp, rodada_escolhida)
+                        views.exibir_top_escalacoes(painel, t_padrao)
+                    else:
+                        st.warning("Coluna 'Rodada' ausente.")
 
-    with tab4:
-        views.exibir_aba_lendas(df_lendas_geral, df_lendas_ligas)
+    if tab4.open:
+        with tab4:
+            df_lendas_geral, df_lendas_campeoes = analytics.lendas(df_camp, sel_temp, r_ini, r_fim)
+            views.exibir_aba_lendas(df_lendas_geral, df_lendas_campeoes,
+                                    lambda: analytics.historico(df_camp))
+
+    # Painel da instrumentação: preenchido no fim, já com as medições deste rerun
+    if painel_instrumentacao is not None and instrumentacao.ativa():
+        with painel_instrumentacao:
+            tb_inst = instrumentacao.resumo()
+            if tb_inst.empty:
+                st.caption("Sem medições ainda.")
+            else:
+                st.dataframe(tb_inst, hide_index=True, width="stretch", column_config={
+                    c: st.column_config.NumberColumn(format='%.2f')
+                    for c in ['p50 (ms)', 'p90 (ms)', 'p99 (ms)', 'Total (s)', 'Memória p90 (MB)']
+                })
+            # O JSON lines só é montado quando o botão é clicado
+            st.download_button("⬇️ Exportar medições (JSON lines)", instrumentacao.exportar_jsonl,
+                               file_name="instrumentacao.jsonl", mime="application/jsonl")
+            if st.button("🧹 Limpar medições"):
+                instrumentacao.limpar()
+                st.rerun()
 
 # --- LÓGICA DE ROTEAMENTO ---
 if st.session_state['pagina_atual'] == 'home':
     home.render_page()
 else:
     executar_sistema()
-
@@ -0,0 +1,2 @@
+# Este ficheiro transforma a pasta 'benchmarks' num pacote Python.
+# Permite rodar a suíte com: python -m benchmarks.pipeline
@@ -0,0 +1,231 @@
+"""
+Suíte de desempenho do pipeline de dados, sem servidor Streamlit.
+
+Gera bases sintéticas (benchmarks.sintetico), grava as planilhas numa pasta
+temporária e mede cada etapa, da carga do arquivo às agregações das abas:
+tempo (melhor de N repetições) e pico de memória (tracemalloc: alocações do
+Python e do NumPy; buffers internos do Arrow não entram). Os números são
+comparados com o baseline gravado e a suíte termina com erro se alguma etapa
+piorar além da tolerância. A etapa filtros_rerun também registra os bytes
+copiados pelos filtros da barra lateral num rerun (copiado_mb: memory_usage dos
+recortes materializados; o pico do tracemalloc cobre as cópias intermediárias).
+
+Uso (na raiz do projeto):
+    python -m benchmarks.pipeline                        # compara com o baseline
+    python -m benchmarks.pipeline --tamanho medio grande
+    python -m benchmarks.pipeline --gravar-baseline      # grava os números atuais
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from modules.sem_servidor import silenciar_streamlit
+
+silenciar_streamlit()  # Antes de importar os módulos com st.cache_data
+
+from benchmarks import sintetico  # noqa: E402
+from modules import data, paralelo, utils  # noqa: E402
+from modules.cache import tamanho_em_bytes  # noqa: E402
+
+BASELINE_PADRAO = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# Diferenças abaixo do piso são ruído de medição, não regressão
+PISO_SEGUNDOS = 0.005
+PISO_MB = 1.0
+
+
+def _carregar_frio(caminho):
+    """Carga sem nenhum cache: sem snapshot colunar e com o st.cache_data limpo."""
+    snap = data._caminho_snapshot(caminho)
+    if os.path.exists(snap):
+        os.remove(snap)
+    data._carregar_caminho.clear()
+    return data.carregar_arquivo(caminho)
+
+
+def _carregar_snapshot(caminho):
+    """Carga de um arquivo já visto: lê o snapshot colunar (st.cache_data limpo)."""
+    data._carregar_caminho.clear()
+    return data.carregar_arquivo(caminho)
+
+
+def _competicao_em_branco(ctx):
+    """Campeonato com a Competição em branco em parte dos jogos (células vazias), padronizado e indexado."""
+    bruto = ctx['bruto_camp'].copy()
+    coluna = 'Competição' if 'Competição' in bruto.columns else 'Competicao'
+    bruto.loc[bruto.index[::7], coluna] = None
+    return utils.indexar(data.padronizar_campeonato(bruto))
+
+
+def _ultima_janela(ctx):
+    temp = sorted(ctx['indice'])[-1]
+    rodadas = utils.rodadas_disponiveis(ctx['atuacoes'], temp, indice=ctx['indice'])
+    return temp, int(rodadas[0]), int(rodadas[-1])
+
+
+def _janela_comp(ctx):
+    temp, r_ini, r_fim = _ultima_janela(ctx)
+    return temp, None, r_ini, r_fim
+
+
+def _rodada_cubo(ctx):
+    temp, _, r_fim = _ultima_janela(ctx)
+    return temp, r_fim, r_fim
+
+
+def _filtros_rerun(ctx):
+    """
+    Recortes que um rerun materializa com os filtros da barra lateral (última
+    temporada, janela inteira): atuações de uma competição e de todas, e as
+    escalações de uma rodada. Nada além deles deve ser copiado.
+    """
+    temp, r_ini, r_fim = _ultima_janela(ctx)
+    comp = sorted(ctx['indice'][temp])[0]
+    return [utils.fatiar_atuacoes(ctx['atuacoes'], temp, comp, r_ini, r_fim, indice=ctx['indice']),
+            utils.fatiar_atuacoes(ctx['atuacoes'], temp, None, r_ini, r_fim, indice=ctx['indice']),
+            utils.filtrar_escalacoes(ctx['esc'], *_rodada_cubo(ctx), indice=ctx['indice_esc'])]
+
+
+# Etapas na ordem do pipeline: (nome, função que recebe o contexto, chave onde o resultado é guardado)
+ETAPAS = [
+    ('carregar_campeonato_frio', lambda c: _carregar_frio(c['arq_camp']), None),
+    ('carregar_campeonato_snapshot', lambda c: _carregar_snapshot(c['arq_camp']), 'bruto_camp'),
+    ('padronizar_campeonato', lambda c: data.padronizar_campeonato(c['bruto_camp']), 'camp'),
+    ('indexar_competicao_em_branco', _competicao_em_branco, None),
+    ('carregar_escalacoes_frio', lambda c: _carregar_frio(c['arq_esc']), None),
+    ('carregar_escalacoes_snapshot', lambda c: _carregar_snapshot(c['arq_esc']), 'bruto_esc'),
+    ('padronizar_escalacoes', lambda c: data.padronizar_escalacoes(c['bruto_esc']), 'esc'),
+    ('carregar_escalacoes_em_blocos', lambda c: data.carregar_em_blocos(c['arq_esc'], data.padronizar_escalacoes),
+     None),
+    ('gerar_atuacoes', lambda c: utils.gerar_atuacoes(c['camp']), 'atuacoes'),
+    ('indexar_atuacoes', lambda c: utils.indexar(c['atuacoes']), 'indice'),
+    ('acumular_classificacao', lambda c: utils.acumular_classificacao(c['atuacoes'], indice=c['indice']),
+     'acumulados'),
+    ('classificacao', lambda c: utils.classificacao(c['acumulados'], *_janela_comp(c)), None),
+    ('raio_x_times', lambda c: utils.raio_x_times(c['atuacoes'], *_janela_comp(c), indice=c['indice']), None),
+    ('indexar_escalacoes', lambda c: utils.indexar(c['esc']), 'indice_esc'),
+    ('filtros_rerun', _filtros_rerun, None),
+    ('campeoes_rodada', lambda c: utils.campeoes_rodada(c['atuacoes']), 'campeoes'),
+    ('gerar_ranking_lendas', lambda c: utils.gerar_ranking_lendas(c['atuacoes'], *_ultima_janela(c),
+                                                                   indice=c['indice'], campeoes=c['campeoes']), None),
+    ('cubo_escalacoes', lambda c: utils.cubo_escalacoes(c['esc']), 'cubo'),
+    ('filtrar_escalacoes', lambda c: utils.filtrar_escalacoes(c['cubo'], *_rodada_cubo(c)), 'cubo_rodada'),
+    ('resumo_escalacoes', lambda c: utils.resumo_escalacoes(c['cubo_rodada']), None),
+    # Todas as temporadas: em sequência e no pool de processos (paralelo.PROCESSOS)
+    ('historico_campeonato', lambda c: paralelo.historico_campeonato(c['camp'], paralelo=False), None),
+    ('historico_campeonato_paralelo', lambda c: paralelo.historico_campeonato(c['camp'], paralelo=True), None),
+    ('historico_escalacoes', lambda c: paralelo.historico_escalacoes(c['esc'], paralelo=False), None),
+    ('historico_escalacoes_paralelo', lambda c: paralelo.historico_escalacoes(c['esc'], paralelo=True), None),
+]
+
+# Etapas cujo resultado (lista de recortes) é pesado: bytes copiados pelos filtros
+ETAPAS_COPIA = {'filtros_rerun'}
+
+
+def medir(tamanho, esquema=1, repeticoes=3, formato='csv'):
+    """Roda todas as ETAPAS para um tamanho: {etapa: {'segundos': ..., 'pico_mb': ...}}."""
+    camp, esc = sintetico.gerar_bases(tamanho, esquema)
+    resultados = {}
+    with tempfile.TemporaryDirectory() as pasta:
+        ctx = {'arq_camp': os.path.join(pasta, f'campeonato.{formato}'),
+               'arq_esc': os.path.join(pasta, f'escalacoes.{formato}')}
+        for df, caminho in [(camp, ctx['arq_camp']), (esc, ctx['arq_esc'])]:
+            df.to_csv(caminho, index=False) if formato == 'csv' else df.to_excel(caminho, index=False)
+
+        for nome, etapa, chave in ETAPAS:
+            # 1ª execução sob o tracemalloc (pico de memória); o resultado alimenta as próximas etapas
+            tracemalloc.start()
+            resultado = etapa(ctx)
+            pico = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            if chave:
+                ctx[chave] = resultado
+
+            tempos = []
+            for _ in range(repeticoes):
+                ini = time.perf_counter()
+                etapa(ctx)
+                tempos.append(time.perf_counter() - ini)
+            resultados[nome] = {'segundos': round(min(tempos), 5), 'pico_mb': round(pico / 1024 ** 2, 3)}
+            if nome in ETAPAS_COPIA:
+                resultados[nome]['copiado_mb'] = round(tamanho_em_bytes(resultado) / 1024 ** 2, 3)
+    return resultados
+
+
+def comparar(atual, baseline, tolerancia_tempo, tolerancia_memoria):
+    """Lista de regressões (texto) de `atual` em relação ao baseline, etapa a etapa."""
+    regressoes = []
+    for cenario, etapas in atual.items():
+        for nome, med in etapas.items():
+            ref = baseline.get(cenario, {}).get(nome)
+            if ref is None:
+                continue
+            if med['segundos'] > ref['segundos'] * (1 + tolerancia_tempo) + PISO_SEGUNDOS:
+                regressoes.append(f"{cenario}/{nome}: {med['segundos']:.4f}s (baseline {ref['segundos']:.4f}s)")
+            if med['pico_mb'] > ref['pico_mb'] * (1 + tolerancia_memoria) + PISO_MB:
+                regressoes.append(f"{cenario}/{nome}: {med['pico_mb']:.1f} MB (baseline {ref['pico_mb']:.1f} MB)")
+            if 'copiado_mb' in med and 'copiado_mb' in ref and \
+                    med['copiado_mb'] > ref['copiado_mb'] * (1 + tolerancia_memoria) + PISO_MB:
+                regressoes.append(f"{cenario}/{nome}: {med['copiado_mb']:.1f} MB copiados "
+                                  f"(baseline {ref['copiado_mb']:.1f} MB)")
+    return regressoes
+
+
+def _imprimir(cenario, resultados, baseline):
+    print(f"\n== {cenario} ==")
+    print(f"{'etapa':32} {'tempo (s)':>10} {'baseline':>10} {'pico (MB)':>10} {'baseline':>10}")
+    for nome, med in resultados.items():
+        ref = baseline.get(cenario, {}).get(nome, {})
+        print(f"{nome:32} {med['segundos']:>10.4f} {ref.get('segundos', float('nan')):>10.4f} "
+              f"{med['pico_mb']:>10.2f} {ref.get('pico_mb', float('nan')):>10.2f}")
+        if 'copiado_mb' in med:
+            print(f"{'  bytes copiados (MB)':32} {'':>10} {'':>10} "
+                  f"{med['copiado_mb']:>10.2f} {ref.get('copiado_mb', float('nan')):>10.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do pipeline de dados do Cartolendários.")
+    parser.add_argument('--tamanho', nargs='+', choices=list(sintetico.TAMANHOS), default=['pequeno', 'medio'])
+    parser.add_argument('--esquema', type=int, choices=[1, 2], default=1)
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--formato', choices=['csv', 'xlsx'], default='csv')
+    parser.add_argument('--baseline', default=BASELINE_PADRAO)
+    parser.add_argument('--gravar-baseline', action='store_true', help="Grava as medições atuais como baseline.")
+    parser.add_argument('--tolerancia-tempo', type=float, default=0.5, help="Piora de tempo aceita (0.5 = +50%%).")
+    parser.add_argument('--tolerancia-memoria', type=float, default=0.2, help="Piora de memória aceita (0.2 = +20%%).")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    # Cada combinação de tamanho, formato e esquema tem o seu baseline
+    atual = {}
+    for tamanho in args.tamanho:
+        cenario = f"{tamanho}-{args.formato}-esquema{args.esquema}"
+        atual[cenario] = medir(tamanho, args.esquema, args.repeticoes, args.formato)
+        _imprimir(cenario, atual[cenario], baseline)
+
+    if args.gravar_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({**baseline, **atual}, f, indent=2, ensure_ascii=False)
+        print(f"\nBaseline gravado em {args.baseline}")
+        return 0
+
+    regressoes = comparar(atual, baseline, args.tolerancia_tempo, args.tolerancia_memoria)
+    if regressoes:
+        print("\nREGRESSÕES:")
+        for r in regressoes:
+            print(f"  - {r}")
+        return 1
+    print("\nSem regressões em relação ao baseline.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
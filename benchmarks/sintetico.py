@@ -0,0 +1,115 @@
+"""
+Geradores de bases sintéticas no formato das planilhas da liga, para medir o
+pipeline em qualquer escala. Os dois esquemas de nomes de colunas que o app
+aceita podem ser gerados:
+
+- esquema 1: Temporada/Competição/Pontuação/Pontuação.1 no campeonato e
+  Nome/Posicao/Capitão/Time Cartola nas escalações (exportação do Cartola);
+- esquema 2: Ano/Competicao/Pontuacao_Mandante/Pontuacao_Visitante no
+  campeonato e Atleta/Posição/Capitao/Time/Ano nas escalações.
+"""
+import numpy as np
+import pandas as pd
+
+# Formação de cada escalação: posição -> quantos atletas
+FORMACAO = {'Goleiro': 1, 'Lateral': 2, 'Zagueiro': 2, 'Meia': 3, 'Atacante': 3, 'Técnico': 1}
+
+COLUNAS_CAMPEONATO = {
+    1: {'temporada': 'Temporada', 'competicao': 'Competição', 'pm': 'Pontuação', 'pv': 'Pontuação.1'},
+    2: {'temporada': 'Ano', 'competicao': 'Competicao', 'pm': 'Pontuacao_Mandante', 'pv': 'Pontuacao_Visitante'},
+}
+COLUNAS_ESCALACOES = {
+    1: {'atleta': 'Nome', 'posicao': 'Posicao', 'capitao': 'Capitão', 'time': 'Time Cartola', 'temporada': 'Temporada'},
+    2: {'atleta': 'Atleta', 'posicao': 'Posição', 'capitao': 'Capitao', 'time': 'Time', 'temporada': 'Ano'},
+}
+
+
+def _nomes_times(times):
+    return np.array([f"Time {i:03d}" for i in range(times)])
+
+
+def gerar_campeonato(temporadas=2, ligas=3, copas=1, times=12, rodadas=20, esquema=1, semente=0):
+    """
+    Jogos de `temporadas` temporadas (a partir de 2020), com `ligas` Ligas e
+    `copas` competições que não são Liga. Todos os times jogam em todas as
+    competições; a cada rodada os confrontos são sorteados.
+    """
+    rng = np.random.default_rng(semente)
+    nomes = _nomes_times(times - times % 2)  # Número par de times: todos jogam em toda rodada
+    competicoes = [f"Liga {i + 1}" for i in range(ligas)] + [f"Copa {i + 1}" for i in range(copas)]
+    jogos_rodada = len(nomes) // 2
+
+    partes = []
+    for temp in range(2020, 2020 + temporadas):
+        for comp in competicoes:
+            # Um sorteio por rodada: metade dos times em casa, metade fora
+            sorteio = np.argsort(rng.random((rodadas, len(nomes))), axis=1)
+            partes.append(pd.DataFrame({
+                'temporada': temp, 'competicao': comp,
+                'Rodada': np.repeat(np.arange(1, rodadas + 1), jogos_rodada),
+                'Mandante': nomes[sorteio[:, ::2].ravel()],
+                'pm': rng.uniform(20, 130, rodadas * jogos_rodada).round(2),
+                'Visitante': nomes[sorteio[:, 1::2].ravel()],
+                'pv': rng.uniform(20, 130, rodadas * jogos_rodada).round(2),
+            }))
+
+    df = pd.concat(partes, ignore_index=True) if partes else pd.DataFrame(
+        columns=['temporada', 'competicao', 'Rodada', 'Mandante', 'pm', 'Visitante', 'pv'])
+    nomes_colunas = COLUNAS_CAMPEONATO[esquema]
+    return df.rename(columns=nomes_colunas)[[nomes_colunas['temporada'], nomes_colunas['competicao'], 'Rodada',
+                                             'Mandante', nomes_colunas['pm'], 'Visitante', nomes_colunas['pv']]]
+
+
+def gerar_escalacoes(temporadas=2, times=12, rodadas=20, atletas_por_posicao=40, esquema=1, semente=0):
+    """
+    Uma escalação completa (FORMACAO) por time por rodada. A escolha dos atletas
+    segue uma popularidade desigual, como na vida real: poucos atletas concentram
+    a maioria das escalações. O primeiro atacante de cada escalação é o capitão.
+    """
+    rng = np.random.default_rng(semente)
+    nomes = _nomes_times(times)
+    posicoes = np.repeat(list(FORMACAO), list(FORMACAO.values()))
+    popularidade = 1 / np.arange(1, atletas_por_posicao + 1)
+    popularidade /= popularidade.sum()
+
+    n_escalacoes = temporadas * rodadas * len(nomes)
+    n = n_escalacoes * len(posicoes)
+    atleta = np.empty(n, dtype=object)
+    pos_linha = np.tile(posicoes, n_escalacoes)
+    for pos in FORMACAO:
+        marca = pos_linha == pos
+        escolhidos = rng.choice(atletas_por_posicao, size=marca.sum(), p=popularidade)
+        atleta[marca] = np.char.add(f"{pos} ", escolhidos.astype(str))
+
+    capitao = np.full(len(posicoes), '-', dtype=object)
+    capitao[np.flatnonzero(posicoes == 'Atacante')[0]] = 'CAP'
+
+    nomes_colunas = COLUNAS_ESCALACOES[esquema]
+    df = pd.DataFrame({
+        'atleta': atleta,
+        'posicao': pos_linha,
+        'Pontos': rng.normal(4, 5, n).round(1),
+        'capitao': np.tile(capitao, n_escalacoes),
+        'Rodada': np.repeat(np.tile(np.arange(1, rodadas + 1), temporadas), len(nomes) * len(posicoes)),
+        'time': np.tile(np.repeat(nomes, len(posicoes)), temporadas * rodadas),
+        'Cartoleiro': np.tile(np.repeat(np.char.add('cartoleiro ', np.arange(len(nomes)).astype(str)),
+                                         len(posicoes)), temporadas * rodadas),
+        'temporada': np.repeat(np.arange(2020, 2020 + temporadas), rodadas * len(nomes) * len(posicoes)),
+    })
+    return df.rename(columns=nomes_colunas)
+
+
+# Tamanhos prontos para a suíte (benchmarks.pipeline)
+TAMANHOS = {
+    'pequeno': {'temporadas': 2, 'ligas': 3, 'copas': 1, 'times': 12, 'rodadas': 20},
+    'medio': {'temporadas': 5, 'ligas': 4, 'copas': 1, 'times': 20, 'rodadas': 38},
+    'grande': {'temporadas': 10, 'ligas': 6, 'copas': 2, 'times': 40, 'rodadas': 38},
+}
+
+
+def gerar_bases(tamanho='pequeno', esquema=1, semente=0):
+    """Par (campeonato, escalações) de um dos TAMANHOS."""
+    p = TAMANHOS[tamanho]
+    camp = gerar_campeonato(p['temporadas'], p['ligas'], p['copas'], p['times'], p['rodadas'], esquema, semente)
+    esc = gerar_escalacoes(p['temporadas'], p['times'], p['rodadas'], esquema=esquema, semente=semente)
+    return camp, esc
@@ -0,0 +1,184 @@
+"""
+Camada de análise, sem Streamlit: cada função recebe uma base carregada
+(campeonato ou escalações) e os filtros da tela, e memoriza o resultado pela
+assinatura da base mais a tupla de filtros. Mexer num widget que não muda os
+filtros de uma função (ex.: a rodada da aba 3) vira só uma consulta ao cache.
+
+Os resultados são compartilhados entre reruns e sessões: trate-os como
+somente leitura (as views só formatam cópias).
+
+Numa base que veio de um delta (data.mesclar_delta), os agregados são
+emendados a partir dos da base anterior, recalculando só as temporadas que
+o delta tocou, e as consultas das outras temporadas reaproveitam os resultados
+da base anterior.
+"""
+import functools
+
+import numpy as np
+import pandas as pd
+
+from modules import paralelo, utils
+from modules.cache import CacheLRU, memorizar_por_assinatura, origem
+
+MAX_RESULTADOS = 256
+MAX_MB_RESULTADOS = 512
+
+_memo = CacheLRU(MAX_RESULTADOS, MAX_MB_RESULTADOS * 1024 * 1024)
+_memorizar = memorizar_por_assinatura(_memo, 'analise')
+
+
+def estatisticas():
+    """Ocupação do cache de análises, para exibir na Área Admin."""
+    return _memo.estatisticas()
+
+
+# --- BASES VINDAS DE UM DELTA ---
+
+def _anterior(func, df):
+    """(resultado de func na base anterior, temporadas alteradas), ou (None, None) se não houver."""
+    marca = origem(df)
+    if marca is None:
+        return None, None
+    return func.em_cache(marca[0]), marca[1]
+
+
+def _recorte(df, temporadas):
+    """Linhas das temporadas dadas: na base ordenada, blocos contíguos do índice."""
+    faixas = [np.arange(ini, fim) for temp, blocos in indice(df).items() if temp in temporadas
+              for ini, fim in blocos.values()]
+    return df.take(np.concatenate(faixas)) if faixas else df.iloc[:0]
+
+
+def _emendar(anterior, novas, temporadas, categorias=None):
+    """Linhas da base anterior das temporadas intactas mais as recalculadas, na ordem das temporadas."""
+    mantidas = anterior[~anterior['Temporada'].isin(list(temporadas))]
+    df = utils.concatenar([mantidas, novas], categorias)
+    return df.sort_values('Temporada', kind='stable', ignore_index=True)
+
+
+def _categorias(df, colunas):
+    """{coluna do resultado: categorias da coluna de origem em df}."""
+    return {destino: df[fonte].cat.categories for destino, fonte in colunas.items()
+            if fonte in df.columns and isinstance(df[fonte].dtype, pd.CategoricalDtype)}
+
+
+def _por_temporada(func):
+    """
+    Consulta de uma temporada: se a base veio de um delta que não tocou essa
+    temporada, o resultado é o mesmo da base anterior e sai do cache dela.
+    """
+    @functools.wraps(func)
+    def consulta(df, temporada, *args):
+        marca = origem(df) if df is not None else None
+        if marca is not None and temporada not in marca[1]:
+            resultado = func.em_cache(marca[0], temporada, *args)
+            if resultado is not None:
+                return resultado
+        return func(df, temporada, *args)
+    return consulta
+
+
+# --- TABELAS POR BASE (montadas uma vez) ---
+
+@_memorizar
+def indice(df):
+    """Offsets de Temporada/Competição (utils.indexar) de qualquer base ordenada."""
+    return utils.indexar(df)
+
+
+@_memorizar
+def atuacoes(df_camp):
+    """Tabela longa de atuações (utils.gerar_atuacoes)."""
+    anterior, temporadas = _anterior(atuacoes, df_camp)
+    if anterior is None or anterior.empty:
+        return utils.gerar_atuacoes(df_camp)
+    return _emendar(anterior, utils.gerar_atuacoes(_recorte(df_camp, temporadas)), temporadas)
+
+
+@_memorizar
+def acumulados(df_camp):
+    """Acumulados por rodada da classificação (utils.acumular_classificacao)."""
+    df_atuacoes = atuacoes(df_camp)
+    anterior, temporadas = _anterior(acumulados, df_camp)
+    if anterior is None:
+        return utils.acumular_classificacao(df_atuacoes, indice=indice(df_atuacoes))
+    novos = utils.acumular_classificacao(_recorte(df_atuacoes, temporadas))
+    return {temp: (novos if temp in temporadas else anterior)[temp] for temp in indice(df_atuacoes)}
+
+
+@_memorizar
+def campeoes(df_camp):
+    """Campeões e Reis de cada rodada (utils.campeoes_rodada)."""
+    df_atuacoes = atuacoes(df_camp)
+    anterior, temporadas = _anterior(campeoes, df_camp)
+    if anterior is None or anterior.empty:
+        return utils.campeoes_rodada(df_atuacoes)
+    novos = utils.campeoes_rodada(_recorte(df_atuacoes, temporadas))
+    colunas = {'Temporada': 'Temporada', 'Competição': 'Competição', 'Time': 'Time', 'Adversário': 'Adv'}
+    return _emendar(anterior, novos, temporadas, _categorias(df_atuacoes, colunas))
+
+
+@_memorizar
+def cubo(df_esc):
+    """Cubo de contagens das escalações (utils.cubo_escalacoes)."""
+    anterior, temporadas = _anterior(cubo, df_esc)
+    if anterior is None or anterior.empty:
+        return utils.cubo_escalacoes(df_esc)
+    novos = utils.cubo_escalacoes(_recorte(df_esc, temporadas))
+    return _emendar(anterior, novos, temporadas, _categorias(df_esc, {c: c for c in utils.CHAVES_CUBO}))
+
+
+# --- CONSULTAS POR FILTRO ---
+
+@_por_temporada
+@_memorizar
+def rodadas(df, temporada, competicao=None):
+    """Rodadas disponíveis de uma temporada (competicao=None pega todas)."""
+    return utils.rodadas_disponiveis(df, temporada, competicao, indice=indice(df))
+
+
+@_por_temporada
+@_memorizar
+def classificacao(df_camp, temporada, competicao, r_ini, r_fim):
+    """Classificação da janela, já ordenada (utils.classificacao)."""
+    return utils.classificacao(acumulados(df_camp), temporada, competicao, r_ini, r_fim)
+
+
+@_por_temporada
+@_memorizar
+def raio_x(df_camp, temporada, competicao, r_ini, r_fim):
+    """Raio-X de todos os times da janela (utils.raio_x_times)."""
+    df_atuacoes = atuacoes(df_camp)
+    return utils.raio_x_times(df_atuacoes, temporada, competicao, r_ini, r_fim, indice=indice(df_atuacoes))
+
+
+@_por_temporada
+@_memorizar
+def lendas(df_camp, temporada, r_ini, r_fim):
+    """Hall da Fama e campeões por rodada da janela (utils.gerar_ranking_lendas)."""
+    df_atuacoes = atuacoes(df_camp)
+    return utils.gerar_ranking_lendas(df_atuacoes, temporada, r_ini, r_fim,
+                                      indice=indice(df_atuacoes), campeoes=campeoes(df_camp))
+
+
+@_por_temporada
+@_memorizar
+def top_escalacoes(df_esc, temporada, rodada):
+    """Painel da aba Top Escalações para uma rodada (utils.resumo_escalacoes)."""
+    df_cubo = cubo(df_esc)
+    recorte = utils.filtrar_escalacoes(df_cubo, temporada, rodada, rodada, indice=indice(df_cubo))
+    return utils.resumo_escalacoes(recorte)
+
+
+# --- TODAS AS TEMPORADAS (processadas em paralelo por temporada) ---
+
+@_memorizar
+def historico(df_camp):
+    """Classificação e Hall da Fama de todas as temporadas (paralelo.historico_campeonato)."""
+    return paralelo.historico_campeonato(df_camp, indice(df_camp))
+
+
+@_memorizar
+def historico_escalacoes(df_esc):
+    """Mais escalados e capitães de todas as temporadas (paralelo.historico_escalacoes)."""
+    return paralelo.historico_escalacoes(df_esc, indice(df_esc))
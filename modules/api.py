@@ -0,0 +1,326 @@
+"""
+Consultas sem navegador: as mesmas análises das abas (modules.analytics, com os
+mesmos caches) em JSON, pela linha de comando ou por um servidor HTTP local
+feito só com a biblioteca padrão. Serve para gerar classificações prontas ou
+atender bots e painéis sem abrir uma sessão do Streamlit por pedido.
+
+Uso (na raiz do projeto):
+    python -m modules.api temporadas
+    python -m modules.api classificacao --temporada 2025 --competicao "Liga A"
+    python -m modules.api raio-x --temporada 2025 --time "Meu Time" --r-ini 1 --r-fim 10
+    python -m modules.api escalacoes --temporada 2025 --rodada 12
+    python -m modules.api lendas --temporada 2025
+    python -m modules.api historico
+    python -m modules.api historico-escalacoes
+    python -m modules.api servir --porta 8502
+
+Rotas HTTP (GET, filtros na query string com os mesmos nomes dos argumentos
+das funções): /temporadas, /classificacao, /raio-x, /escalacoes, /lendas,
+/historico e /historico-escalacoes.
+Ex.: /classificacao?temporada=2025&competicao=Liga%20A&r_ini=1&r_fim=10
+"""
+import argparse
+import json
+import sys
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from modules.sem_servidor import silenciar_streamlit
+
+silenciar_streamlit()  # Antes de importar os módulos com st.cache_data
+
+from modules import analytics, data, preaquecimento  # noqa: E402
+from modules.cache import CacheLRU  # noqa: E402
+
+# Mesmos arquivos padrão do app (com os deltas gravados pela Área Admin)
+ARQUIVO_CAMPEONATO = "dados_campeonato.xlsx"
+ARQUIVO_ESCALACOES = "dados_escalacoes.xlsx"
+
+
+class ConsultaInvalida(ValueError):
+    """Filtro inexistente ou base não encontrada (HTTP 400 / saída 2 na linha de comando)."""
+
+
+def _campeonato():
+    df = data.carregar_base(ARQUIVO_CAMPEONATO, data.padronizar_campeonato)
+    if df is None or df.empty:
+        raise ConsultaInvalida(f"Base do campeonato não encontrada: {ARQUIVO_CAMPEONATO}")
+    return df
+
+
+def _escalacoes():
+    df = data.carregar_base(ARQUIVO_ESCALACOES, data.padronizar_escalacoes)
+    if df is None or df.empty:
+        raise ConsultaInvalida(f"Base de escalações não encontrada: {ARQUIVO_ESCALACOES}")
+    return df
+
+
+def _registros(df):
+    """DataFrame em lista de dicts com tipos do JSON (NaN vira null)."""
+    if df is None or df.empty:
+        return []
+    return json.loads(df.to_json(orient='records', force_ascii=False, double_precision=6))
+
+
+def _historico(hist):
+    """Histórico do Raio-X com números de verdade (o de utils.raio_x_times vem formatado para a tela)."""
+    hist = hist.drop(columns='').astype({'Rodada': int, 'Sua Pont.': float, 'Pont. Adv.': float})
+    return _registros(hist)
+
+
+def _nativo(obj):
+    """Tipos do NumPy/pandas que o json não conhece (usado como default do json.dumps)."""
+    if hasattr(obj, 'item'):
+        return obj.item()
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    return str(obj)
+
+
+def _janela(df, temporada, competicao=None, r_ini=None, r_fim=None):
+    """
+    Valida os filtros como na barra lateral do app: competição None ou 'Todas'
+    pega todas e a janela padrão é a temporada inteira.
+    """
+    indice = analytics.indice(df)
+    temporada = str(temporada)
+    if temporada not in indice:
+        raise ConsultaInvalida(f"Temporada inexistente: {temporada}")
+    competicao = None if competicao in (None, '', 'Todas') else competicao
+    if competicao is not None and competicao not in indice[temporada]:
+        raise ConsultaInvalida(f"Competição inexistente em {temporada}: {competicao}")
+
+    rodadas = analytics.rodadas(df, temporada)
+    r_ini = int(rodadas[0]) if r_ini is None else int(r_ini)
+    r_fim = int(rodadas[-1]) if r_fim is None else int(r_fim)
+    if r_ini > r_fim:
+        raise ConsultaInvalida(f"Janela de rodadas inválida: {r_ini} a {r_fim}")
+    return temporada, competicao, r_ini, r_fim
+
+
+# --- CONSULTAS ---
+
+def temporadas():
+    """Temporadas com as competições e a faixa de rodadas de cada uma."""
+    df = _campeonato()
+    saida = {}
+    for temp, blocos in sorted(analytics.indice(df).items(), reverse=True):
+        rodadas = analytics.rodadas(df, temp)
+        saida[temp] = {'competicoes': sorted(blocos), 'rodadas': [int(rodadas[0]), int(rodadas[-1])]}
+    return saida
+
+
+def classificacao(temporada, competicao=None, r_ini=None, r_fim=None):
+    """Tabela da Liga da janela, já ordenada (aba 1)."""
+    df = _campeonato()
+    temporada, competicao, r_ini, r_fim = _janela(df, temporada, competicao, r_ini, r_fim)
+    tabela = analytics.classificacao(df, temporada, competicao, r_ini, r_fim)
+    return {'temporada': temporada, 'competicao': competicao or 'Todas', 'r_ini': r_ini, 'r_fim': r_fim,
+            'tabela': _registros(tabela)}
+
+
+def raio_x(temporada, competicao=None, r_ini=None, r_fim=None, time=None):
+    """KPIs e histórico de jogos de um time (ou de todos) na janela (aba 2)."""
+    df = _campeonato()
+    temporada, competicao, r_ini, r_fim = _janela(df, temporada, competicao, r_ini, r_fim)
+    times = analytics.raio_x(df, temporada, competicao, r_ini, r_fim)
+    if time is not None:
+        if time not in times:
+            raise ConsultaInvalida(f"Time sem jogos na janela: {time}")
+        times = {time: times[time]}
+    return {'temporada': temporada, 'competicao': competicao or 'Todas', 'r_ini': r_ini, 'r_fim': r_fim,
+            'times': {t: {'resumo': {k: round(v, 6) for k, v in r['resumo'].items()}, 'historico': _historico(r['hist'])}
+                      for t, r in times.items()}}
+
+
+def escalacoes(temporada, rodada=None, time=None):
+    """Mais escalados, capitães e top por posição de uma rodada (aba 3); padrão: a última rodada."""
+    df = _escalacoes()
+    temporada = str(temporada)
+    if temporada not in analytics.indice(df):
+        raise ConsultaInvalida(f"Sem escalações para {temporada}")
+    rodadas = [int(r) for r in analytics.rodadas(df, temporada)]
+    rodada = rodadas[-1] if rodada is None else int(rodada)
+    if rodada not in rodadas:
+        raise ConsultaInvalida(f"Rodada sem escalações em {temporada}: {rodada}")
+
+    painel = analytics.top_escalacoes(df, temporada, rodada)
+    por_time = painel['por_time']
+    if time is not None:
+        if time not in por_time:
+            raise ConsultaInvalida(f"Time sem escalações na rodada {rodada}: {time}")
+        por_time = {time: por_time[time]}
+    return {
+        'temporada': temporada, 'rodada': rodada, 'times': painel['times'],
+        'queridinhos': _registros(painel['queridinhos']), 'capitaes': _registros(painel['capitaes']),
+        'geral': {pos: _registros(top) for pos, top in painel['geral'].items()},
+        'por_time': {t: {pos: _registros(top) for pos, top in tops.items()} for t, tops in por_time.items()},
+    }
+
+
+def lendas(temporada, r_ini=None, r_fim=None):
+    """Hall da Fama e campeões de cada rodada por Liga, com os Reis (aba 4)."""
+    df = _campeonato()
+    temporada, _, r_ini, r_fim = _janela(df, temporada, None, r_ini, r_fim)
+    geral, campeoes = analytics.lendas(df, temporada, r_ini, r_fim)
+    return {'temporada': temporada, 'r_ini': r_ini, 'r_fim': r_fim,
+            'hall_da_fama': _registros(geral), 'campeoes': _registros(campeoes)}
+
+
+def historico():
+    """Classificação e Hall da Fama de todas as temporadas somadas (aba 4, Todas as Temporadas)."""
+    tabela, hall = analytics.historico(_campeonato())
+    return {'tabela': _registros(tabela), 'hall_da_fama': _registros(hall)}
+
+
+def historico_escalacoes():
+    """Atletas mais escalados e capitães mais escolhidos de todas as temporadas."""
+    resumo = analytics.historico_escalacoes(_escalacoes())
+    return {'queridinhos': _registros(resumo['queridinhos']), 'capitaes': _registros(resumo['capitaes'])}
+
+
+# Rota (e subcomando) -> consulta. Os filtros numéricos chegam como texto pela URL.
+CONSULTAS = {
+    'temporadas': temporadas,
+    'classificacao': classificacao,
+    'raio-x': raio_x,
+    'escalacoes': escalacoes,
+    'lendas': lendas,
+    'historico': historico,
+    'historico-escalacoes': historico_escalacoes,
+}
+PARAMETROS_INTEIROS = {'r_ini', 'r_fim', 'rodada'}
+
+
+def consultar(nome, **filtros):
+    """Roda a consulta `nome` com os filtros (valores None são ignorados)."""
+    if nome not in CONSULTAS:
+        raise ConsultaInvalida(f"Consulta inexistente: {nome}")
+    filtros = {k: v for k, v in filtros.items() if v is not None}
+    try:
+        filtros = {k: int(v) if k in PARAMETROS_INTEIROS else v for k, v in filtros.items()}
+        return CONSULTAS[nome](**filtros)
+    except (TypeError, ValueError) as e:
+        if isinstance(e, ConsultaInvalida):
+            raise
+        raise ConsultaInvalida(f"Filtros inválidos para {nome}: {e}") from e
+
+
+# --- SERVIDOR HTTP ---
+# As análises já saem dos caches do analytics; o JSON pronto de cada pedido
+# também fica guardado, pelos filtros e pela versão das bases.
+MAX_RESPOSTAS = 1024
+MAX_MB_RESPOSTAS = 64
+
+_respostas = CacheLRU(MAX_RESPOSTAS, MAX_MB_RESPOSTAS * 1024 * 1024)
+
+
+def _versao_das_bases():
+    """Arquivo trocado ou delta novo (ex.: pela Área Admin do app) invalida as respostas guardadas."""
+    return data.versao_base(ARQUIVO_CAMPEONATO), data.versao_base(ARQUIVO_ESCALACOES)
+
+
+def _json(corpo):
+    return json.dumps(corpo, ensure_ascii=False, default=_nativo).encode('utf-8')
+
+
+def resposta_json(nome, filtros):
+    """consultar(nome, **filtros) já codificada em JSON (bytes)."""
+    chave = (nome, tuple(sorted(filtros.items())), _versao_das_bases())
+    conteudo = _respostas.obter(chave)
+    if conteudo is None:
+        conteudo = _respostas.guardar(chave, _json(consultar(nome, **filtros)))
+    return conteudo
+
+
+class _Manipulador(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlsplit(self.path)
+        nome = url.path.strip('/')
+        filtros = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        try:
+            conteudo, status = resposta_json(nome, filtros), 200
+        except ConsultaInvalida as e:
+            conteudo, status = _json({'erro': str(e)}), 404 if nome not in CONSULTAS else 400
+        except Exception:  # Falha inesperada: o cliente recebe JSON e o servidor segue atendendo
+            print(f"Erro ao atender {self.path}:", file=sys.stderr)
+            traceback.print_exc()
+            conteudo, status = _json({'erro': "Erro interno ao processar a consulta"}), 500
+        self._responder(status, conteudo)
+
+    def _responder(self, status, conteudo):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(conteudo)))
+        self.end_headers()
+        self.wfile.write(conteudo)
+
+    def log_message(self, formato, *args):
+        pass  # Um log por pedido custaria mais que a própria consulta em cache
+
+
+def servir(host='127.0.0.1', porta=8502):
+    """Servidor HTTP/JSON (uma thread por conexão; os caches são do processo todo)."""
+    servidor = ThreadingHTTPServer((host, porta), _Manipulador)
+    # As bases são carregadas e pré-calculadas em segundo plano enquanto o servidor já atende
+    preaquecimento.agendar_carga(data.versao_base(ARQUIVO_CAMPEONATO), _campeonato,
+                                 preaquecimento.preaquecer_campeonato)
+    preaquecimento.agendar_carga(data.versao_base(ARQUIVO_ESCALACOES), _escalacoes,
+                                 preaquecimento.preaquecer_escalacoes)
+    print(f"API do Cartolendários em http://{host}:{porta}/ (Ctrl+C encerra)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+
+# --- LINHA DE COMANDO ---
+
+def main(argv=None):
+    global ARQUIVO_CAMPEONATO, ARQUIVO_ESCALACOES
+    parser = argparse.ArgumentParser(description="Consultas do Cartolendários em JSON, sem o Streamlit.")
+    parser.add_argument('--campeonato', default=ARQUIVO_CAMPEONATO, help="Planilha de jogos.")
+    parser.add_argument('--escalacoes', default=ARQUIVO_ESCALACOES, help="Planilha de escalações.")
+    sub = parser.add_subparsers(dest='comando', required=True)
+
+    sub.add_parser('temporadas', help="Temporadas, competições e rodadas disponíveis.")
+    for nome, ajuda in [('classificacao', "Tabela da Liga."), ('raio-x', "Raio-X dos times."),
+                        ('lendas', "Hall da Fama e campeões por rodada.")]:
+        p = sub.add_parser(nome, help=ajuda)
+        p.add_argument('--temporada', required=True)
+        if nome != 'lendas':
+            p.add_argument('--competicao', help="Padrão: todas.")
+        p.add_argument('--r-ini', type=int, dest='r_ini', help="Padrão: primeira rodada da temporada.")
+        p.add_argument('--r-fim', type=int, dest='r_fim', help="Padrão: última rodada da temporada.")
+        if nome == 'raio-x':
+            p.add_argument('--time', help="Padrão: todos os times.")
+    p = sub.add_parser('escalacoes', help="Top escalações de uma rodada.")
+    p.add_argument('--temporada', required=True)
+    p.add_argument('--rodada', type=int, help="Padrão: última rodada com escalações.")
+    p.add_argument('--time', help="Padrão: todos os times.")
+    sub.add_parser('historico', help="Classificação e Hall da Fama de todas as temporadas.")
+    sub.add_parser('historico-escalacoes', help="Mais escalados e capitães de todas as temporadas.")
+    p = sub.add_parser('servir', help="Sobe o servidor HTTP/JSON.")
+    p.add_argument('--host', default='127.0.0.1')
+    p.add_argument('--porta', type=int, default=8502)
+    args = vars(parser.parse_args(argv))
+
+    ARQUIVO_CAMPEONATO, ARQUIVO_ESCALACOES = args.pop('campeonato'), args.pop('escalacoes')
+    comando = args.pop('comando')
+    if comando == 'servir':
+        servir(args['host'], args['porta'])
+        return 0
+    try:
+        resultado = consultar(comando, **args)
+    except ConsultaInvalida as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        return 2
+    print(json.dumps(resultado, ensure_ascii=False, indent=2, default=_nativo))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,76 @@
+import base64
+import hashlib
+import io
+import os
+
+import streamlit as st
+from PIL import Image
+
+# Pasta servida pelo Streamlit em app/static/ (server.enableStaticServing em
+# .streamlit/config.toml). As versões reduzidas das imagens são gravadas aqui.
+PASTA_STATIC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static')
+URL_STATIC = 'app/static'
+
+
+@st.cache_resource(show_spinner=False)
+def _reduzir(caminho, largura_max, mtime):
+    """
+    Lê, reduz e recomprime a imagem uma única vez por processo (o mtime entra na
+    chave para que um arquivo trocado seja relido). Devolve (bytes, mime, extensão).
+    """
+    with Image.open(caminho) as img:
+        img.load()
+        formato = img.format or 'PNG'
+        if img.width > largura_max:
+            img = img.resize((largura_max, round(img.height * largura_max / img.width)), Image.LANCZOS)
+
+        saida = io.BytesIO()
+        if formato == 'JPEG':
+            img.convert('RGB').save(saida, 'JPEG', quality=85, optimize=True, progressive=True)
+            return saida.getvalue(), 'image/jpeg', 'jpg'
+        img.save(saida, 'PNG', optimize=True)
+        return saida.getvalue(), 'image/png', 'png'
+
+
+def imagem(caminho, largura_max):
+    """Bytes da imagem reduzida para st.image, ou None se o arquivo não existir."""
+    try:
+        return _reduzir(caminho, largura_max, os.stat(caminho).st_mtime_ns)[0]
+    except (OSError, ValueError):
+        return None
+
+
+@st.cache_resource(show_spinner=False)
+def _data_uri(caminho, largura_max, mtime):
+    conteudo, mime, _ = _reduzir(caminho, largura_max, mtime)
+    return f"data:{mime};base64,{base64.b64encode(conteudo).decode()}"
+
+
+@st.cache_resource(show_spinner=False)
+def _publicar(caminho, largura_max, mtime):
+    """Grava a versão reduzida na pasta static (uma vez por processo) e devolve a URL."""
+    conteudo, _, ext = _reduzir(caminho, largura_max, mtime)
+    # O hash no nome evita que o navegador mostre uma versão antiga em cache
+    nome = f"{os.path.splitext(os.path.basename(caminho))[0]}-{largura_max}-{hashlib.sha1(conteudo).hexdigest()[:8]}.{ext}"
+    try:
+        os.makedirs(PASTA_STATIC, exist_ok=True)
+        with open(os.path.join(PASTA_STATIC, nome), 'wb') as f:
+            f.write(conteudo)
+        return f"{URL_STATIC}/{nome}"
+    except OSError:
+        # Pasta somente leitura: cai no data URI, ainda com a imagem reduzida
+        return _data_uri(caminho, largura_max, mtime)
+
+
+def url_imagem(caminho, largura_max):
+    """
+    Endereço da imagem reduzida para usar em HTML: servida pelo static serving
+    do Streamlit quando ele está ligado, senão como data URI. None se o arquivo não existir.
+    """
+    try:
+        mtime = os.stat(caminho).st_mtime_ns
+        if st.get_option('server.enableStaticServing'):
+            return _publicar(caminho, largura_max, mtime)
+        return _data_uri(caminho, largura_max, mtime)
+    except (OSError, ValueError):
+        return None
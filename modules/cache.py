@@ -0,0 +1,213 @@
+import functools
+import hashlib
+import inspect
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from modules import instrumentacao
+
+
+def tamanho_em_bytes(obj):
+    """Estimativa do espaço ocupado por um item do cache."""
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(index=True, deep=True).sum())
+    if isinstance(obj, pd.Series):
+        return int(obj.memory_usage(index=True, deep=True))
+    if isinstance(obj, (tuple, list)):
+        return sum(tamanho_em_bytes(o) for o in obj)
+    if isinstance(obj, dict):
+        return sum(tamanho_em_bytes(o) for o in obj.values())
+    return sys.getsizeof(obj)
+
+
+class CacheLRU:
+    """
+    Cache LRU compartilhado pelo processo (todas as sessões do Streamlit),
+    limitado por quantidade de itens e por memória.
+    """
+
+    def __init__(self, max_itens, max_bytes):
+        self.max_itens = max_itens
+        self.max_bytes = max_bytes
+        self._itens = OrderedDict()  # chave -> (valor, bytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def obter(self, chave, padrao=None):
+        with self._lock:
+            if chave not in self._itens:
+                self.misses += 1
+                return padrao
+            self._itens.move_to_end(chave)
+            self.hits += 1
+            return self._itens[chave][0]
+
+    def espiar(self, chave, padrao=None):
+        """Como obter, mas sem contar hit/miss nem mexer na ordem do LRU (sondagens)."""
+        with self._lock:
+            item = self._itens.get(chave)
+            return padrao if item is None else item[0]
+
+    def guardar(self, chave, valor):
+        tam = tamanho_em_bytes(valor)
+        with self._lock:
+            if chave in self._itens:
+                self._bytes -= self._itens.pop(chave)[1]
+            # Item maior que o limite inteiro não é guardado
+            if tam > self.max_bytes:
+                return valor
+            self._itens[chave] = (valor, tam)
+            self._bytes += tam
+            while len(self._itens) > self.max_itens or self._bytes > self.max_bytes:
+                self._bytes -= self._itens.popitem(last=False)[1][1]
+        return valor
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+            self._bytes = 0
+
+    def estatisticas(self):
+        with self._lock:
+            return {'itens': len(self._itens), 'max_itens': self.max_itens,
+                    'bytes': self._bytes, 'max_bytes': self.max_bytes,
+                    'hits': self.hits, 'misses': self.misses}
+
+
+# --- ASSINATURA DAS BASES ---
+# Impressão digital do conteúdo guardada em df.attrs, usada como chave dos caches.
+# Vale só para o formato (linhas, colunas e tipos) em que foi registrada: um
+# recorte ou uma cópia alterada herda o attrs, mas não a assinatura.
+ATRIBUTO_ASSINATURA = 'assinatura'
+
+
+def _forma(df):
+    return len(df), tuple(map(str, df.columns)), tuple(map(str, df.dtypes))
+
+
+def assinar(df, valor):
+    """Registra a assinatura da base (ex.: sha1 do arquivo de origem) e devolve a própria base."""
+    df.attrs[ATRIBUTO_ASSINATURA] = (str(valor), _forma(df))
+    return df
+
+
+def assinatura_registrada(df):
+    """Assinatura já registrada na base, ou None se não houver (ou se a base mudou de formato)."""
+    marca = df.attrs.get(ATRIBUTO_ASSINATURA) if df is not None else None
+    if marca is None or marca[1] != _forma(df):
+        return None
+    return marca[0]
+
+
+def assinatura(df):
+    """
+    Assinatura da base. Sem registro prévio, é calculada pelo hash do conteúdo
+    uma única vez e fica guardada no próprio objeto.
+    """
+    valor = assinatura_registrada(df)
+    if valor is None:
+        h = hashlib.sha1(repr(_forma(df)).encode())
+        h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+        valor = h.hexdigest()
+        assinar(df, valor)
+    return valor
+
+
+# --- ORIGEM INCREMENTAL ---
+# Uma base montada a partir de outra mais um delta (data.mesclar_delta) guarda a
+# assinatura da base anterior e as temporadas que o delta tocou: os agregados
+# das demais temporadas podem ser reaproveitados do cache da base anterior.
+ATRIBUTO_ORIGEM = 'origem'
+
+
+def registrar_origem(df, anterior, temporadas):
+    """Registra que `df` é a base de assinatura `anterior` com as `temporadas` alteradas."""
+    df.attrs[ATRIBUTO_ORIGEM] = (assinatura(df), anterior, frozenset(temporadas))
+    return df
+
+
+def origem(df):
+    """(assinatura da base anterior, temporadas alteradas), ou None se a base não veio de um delta."""
+    marca = df.attrs.get(ATRIBUTO_ORIGEM) if df is not None else None
+    if marca is None or marca[0] != assinatura_registrada(df):
+        return None
+    return marca[1], marca[2]
+
+
+def congelar(obj):
+    """
+    Marca como somente leitura os arrays numéricos e os códigos das categorias de
+    um DataFrame (ou dos DataFrames de um dict/tupla/lista). Objetos compartilhados entre sessões ficam protegidos: uma
+    escrita acidental vira erro em vez de alterar os dados de todo mundo.
+    """
+    if isinstance(obj, pd.DataFrame):
+        for bloco in getattr(obj._mgr, 'blocks', ()):
+            valores = getattr(bloco.values, '_codes', bloco.values)  # Categorical: trava os códigos
+            # Arrays de objetos ficam de fora: rotinas internas do pandas exigem buffer gravável
+            if isinstance(valores, np.ndarray) and valores.dtype != object:
+                valores.flags.writeable = False
+    elif isinstance(obj, dict):
+        for valor in obj.values():
+            congelar(valor)
+    elif isinstance(obj, (tuple, list)):
+        for valor in obj:
+            congelar(valor)
+    return obj
+
+
+_AUSENTE = object()
+
+
+def memorizar_por_assinatura(cache, etapa):
+    """
+    Decorador: memoriza func(base, *args) em `cache` pela chave (nome da função,
+    assinatura da base, args). DataFrames devolvidos ganham assinatura própria,
+    então usá-los como base de outra função memorizada não exige hash do conteúdo.
+    Os resultados são compartilhados, por isso saem congelados (ver congelar).
+    Com a instrumentação ligada, cada chamada é registrada na `etapa` como hit ou miss.
+    A função decorada ganha `em_cache(assinatura, *args)`, que só consulta o
+    cache (sem contar nas estatísticas). Argumentos omitidos entram na chave com
+    o valor padrão: f(df, t) e f(df, t, None) dividem o mesmo item.
+    """
+    def decorador(func):
+        nome = f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+        posicionais = (inspect.Parameter.POSITIONAL_ONLY, inspect.Parameter.POSITIONAL_OR_KEYWORD)
+        padroes = [p.default for p in list(inspect.signature(func).parameters.values())[1:] if p.kind in posicionais]
+
+        def completar(args):
+            # Só completa se todos os que faltam têm padrão; senão a própria func acusa o erro
+            faltando = padroes[len(args):]
+            if faltando and all(p is not inspect.Parameter.empty for p in faltando):
+                return args + tuple(faltando)
+            return args
+
+        @functools.wraps(func)
+        def memorizada(base, *args):
+            if base is None:
+                return func(base, *args)
+            med = instrumentacao.iniciar()
+            args = completar(args)
+            chave = (func.__name__, assinatura(base), args)
+            resultado = cache.obter(chave, _AUSENTE)
+            acerto = resultado is not _AUSENTE
+            if not acerto:
+                resultado = func(base, *args)
+                if isinstance(resultado, pd.DataFrame):
+                    assinar(resultado, repr(chave))
+                resultado = cache.guardar(chave, congelar(resultado))
+            if med:
+                med.fechar(nome, etapa, base, resultado, cache='hit' if acerto else 'miss')
+            return resultado
+
+        def em_cache(assinatura_base, *args):
+            return cache.espiar((func.__name__, assinatura_base, completar(args)))
+
+        memorizada.em_cache = em_cache
+        return memorizada
+    return decorador
@@ -1,43 +1,298 @@
+import hashlib
+import io
+import numpy as np
+import openpyxl
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.feather as feather
 import streamlit as st
 import os
 from datetime import datetime
 
+from modules import instrumentacao, utils
+from modules.cache import CacheLRU, assinar, assinatura, assinatura_registrada, congelar, registrar_origem
+
+
+# Etapa gravada nos metadados do snapshot: a planilha crua ou a base já padronizada
+# (nome da função de padronização), cada uma no seu arquivo
+ETAPA_BRUTA = 'bruto'
+
+
+def _caminho_snapshot(caminho, etapa=ETAPA_BRUTA):
+    """
+    Snapshot colunar fica ao lado da planilha: .dados_escalacoes.xlsx.feather
+    (crua) ou .dados_escalacoes.xlsx.padronizar_escalacoes.feather (padronizada).
+    """
+    pasta, nome = os.path.split(os.path.abspath(caminho))
+    return os.path.join(pasta, f".{nome}.feather" if etapa == ETAPA_BRUTA else f".{nome}.{etapa}.feather")
+
+
+def _hash_arquivo(caminho):
+    h = hashlib.sha1()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(1 << 20), b''):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def _nulos_como_nan(df):
+    """Nulos de texto vindos do Arrow (None) voltam como NaN, igual ao read_excel."""
+    for c in df.columns[df.dtypes == object]:
+        if df[c].hasnans:
+            df[c] = df[c].where(df[c].notna(), np.nan)
+    return df
+
+
+def _de_arrow(snap):
+    """Lê o snapshot via memory-map (gravado sem compressão, as colunas são lidas direto do arquivo)."""
+    return _nulos_como_nan(feather.read_table(snap, memory_map=True).to_pandas())
+
+
+def _ler_snapshot(caminho, origem, etapa=ETAPA_BRUTA):
+    """
+    Lê o snapshot (memory-map) se ele corresponder à planilha e à etapa; senão
+    devolve None. Snapshots sem a etapa nos metadados são descartados (podem
+    ser bases padronizadas gravadas no lugar do snapshot cru).
+    """
+    snap = _caminho_snapshot(caminho, etapa)
+    if not os.path.exists(snap):
+        return None
+    try:
+        with pa.memory_map(snap) as fonte:
+            meta = pa.ipc.open_file(fonte).schema.metadata or {}
+        meta = {k.decode(): v.decode() for k, v in meta.items()}
+        if meta.get('etapa') != etapa:
+            return None
+
+        # mtime e tamanho batem: nem precisa calcular o hash
+        if meta.get('mtime') != origem['mtime'] or meta.get('tamanho') != origem['tamanho']:
+            origem['sha1'] = origem.get('sha1') or _hash_arquivo(caminho)
+            if meta.get('sha1') != origem['sha1']:
+                return None
+            # Conteúdo igual com mtime novo (ex.: cópia do arquivo): atualiza o snapshot
+            df = _de_arrow(snap)
+            _gravar_snapshot(caminho, df, origem, etapa)
+            return df
+
+        origem['sha1'] = meta.get('sha1')
+        return _de_arrow(snap)
+    except (OSError, pa.ArrowException):
+        return None
+
+
+def _gravar_snapshot(caminho, df, origem, etapa=ETAPA_BRUTA):
+    """Grava o snapshot colunar. Falhas (ex.: pasta somente leitura) não impedem a carga."""
+    try:
+        tabela = pa.Table.from_pandas(df, preserve_index=False)
+        tabela = tabela.replace_schema_metadata({**(tabela.schema.metadata or {}), **origem, 'etapa': etapa})
+        # Sem compressão: com o LZ4 padrão o memory-map não evita descomprimir tudo para a memória
+        feather.write_feather(tabela, _caminho_snapshot(caminho, etapa), compression='uncompressed')
+    except (OSError, pa.ArrowException):
+        pass
+
+
+def _ler_caminho(caminho, mtime, tamanho):
+    """Carga de arquivo em disco (snapshot colunar quando existe). A base sai
+    assinada com o sha1 do arquivo (chave dos caches de modules.analytics)."""
+    origem = {'mtime': mtime, 'tamanho': tamanho}
+    df = _ler_snapshot(caminho, origem)
+    if df is not None:
+        return assinar(df, origem['sha1']) if origem.get('sha1') else df
+
+    df = pd.read_excel(caminho) if not caminho.endswith('.csv') else pd.read_csv(caminho)
+    df.columns = df.columns.str.strip()
+    df = utils.normalizar_colunas_mistas(df)
+
+    origem['sha1'] = origem.get('sha1') or _hash_arquivo(caminho)
+    _gravar_snapshot(caminho, df, origem)
+    return assinar(df, origem['sha1'])
+
+
 @st.cache_data
+def _carregar_caminho(caminho, mtime, tamanho):
+    """Carga de arquivo em disco. mtime e tamanho entram na chave do cache para
+    que uma planilha alterada seja relida sem reiniciar o app."""
+    return _ler_caminho(caminho, mtime, tamanho)
+
+
+def _ler_upload(arquivo, conteudo=None):
+    conteudo = io.BytesIO(arquivo.getvalue() if conteudo is None else conteudo)
+    df = pd.read_excel(conteudo) if not arquivo.name.endswith('.csv') else pd.read_csv(conteudo)
+    df.columns = df.columns.str.strip()
+    return df
+
+
+@instrumentacao.medir('carga')
 def carregar_arquivo(file_or_path):
     """Lê Excel ou CSV e faz limpeza básica."""
     try:
         if isinstance(file_or_path, str):
             if not os.path.exists(file_or_path): return None
-            df = pd.read_excel(file_or_path) if not file_or_path.endswith('.csv') else pd.read_csv(file_or_path)
-        else:
-            df = pd.read_excel(file_or_path) if not file_or_path.name.endswith('.csv') else pd.read_csv(file_or_path)
-        
-        df.columns = df.columns.str.strip()
+            info = os.stat(file_or_path)
+            return _carregar_caminho(file_or_path, str(info.st_mtime_ns), str(info.st_size))
+        return _ler_upload(file_or_path)
+    except Exception:
+        return None
+
+
+# --- BASES COMPARTILHADAS ---
+# As planilhas padrão são lidas e padronizadas uma vez por processo e a mesma
+# base (congelada, somente leitura) serve todas as sessões: a memória cresce com
+# o número de bases distintas, não com o de usuários conectados.
+MAX_BASES_COMPARTILHADAS = 8
+
+
+@st.cache_resource(show_spinner=False, max_entries=MAX_BASES_COMPARTILHADAS)
+def _base_compartilhada(caminho, mtime, tamanho, etapa, _padronizar):
+    if _em_blocos(int(tamanho), _padronizar):
+        return congelar(_padronizar_em_blocos(caminho, mtime, tamanho, _padronizar))
+    return congelar(_padronizar(_ler_caminho(caminho, mtime, tamanho)))
+
+
+def _base_do_arquivo(caminho, padronizar):
+    if not os.path.exists(caminho): return None
+    info = os.stat(caminho)
+    return _base_compartilhada(caminho, str(info.st_mtime_ns), str(info.st_size), padronizar.__name__, padronizar)
+
+
+@instrumentacao.medir('carga')
+def carregar_base(caminho, padronizar):
+    """
+    Base padronizada (padronizar_campeonato ou padronizar_escalacoes) de um
+    arquivo em disco, já com os deltas gravados (aplicar_delta), compartilhada
+    entre sessões. Somente leitura: quem precisar alterar deve trabalhar numa cópia.
+    """
+    try:
+        return _com_deltas(caminho, _base_do_arquivo(caminho, padronizar), padronizar)
+    except Exception:
+        return None
+
+
+# --- CACHE DE UPLOADS (ÁREA ADMIN) ---
+# Guarda as últimas versões já padronizadas, indexadas pelo hash do conteúdo:
+# trocar entre arquivos já enviados não reprocessa nada.
+MAX_VERSOES_UPLOAD = 8
+MAX_MB_UPLOADS = 256
+
+_cache_uploads = CacheLRU(MAX_VERSOES_UPLOAD, MAX_MB_UPLOADS * 1024 * 1024)
+_hash_por_upload = CacheLRU(64, 1024 * 1024)  # file_id -> sha1 do conteúdo
+
+
+@instrumentacao.medir('carga')
+def carregar_upload(arquivo, padronizar):
+    """
+    Carrega um arquivo enviado já padronizado (padronizar_campeonato ou
+    padronizar_escalacoes). Como em carregar_base, a base é compartilhada e somente leitura.
+    """
+    try:
+        # O hash dos bytes é calculado uma única vez por upload
+        file_id = getattr(arquivo, 'file_id', None)
+        sha1 = _hash_por_upload.obter(file_id) if file_id else None
+        conteudo = None
+        if sha1 is None:
+            conteudo = arquivo.getvalue()
+            sha1 = hashlib.sha1(conteudo).hexdigest()
+            if file_id:
+                _hash_por_upload.guardar(file_id, sha1)
+
+        chave = (padronizar.__name__, sha1)
+        df = _cache_uploads.obter(chave)
+        if df is None:
+            if _em_blocos(getattr(arquivo, 'size', 0), padronizar):
+                conteudo = arquivo.getvalue() if conteudo is None else conteudo
+                df = carregar_em_blocos(io.BytesIO(conteudo), padronizar, arquivo.name)
+            else:
+                df = padronizar(_ler_upload(arquivo, conteudo))
+            df = _cache_uploads.guardar(chave, congelar(assinar(df, ':'.join(chave))))
         return df
     except Exception:
         return None
 
-def padronizar_campeonato(df):
-    """Ajusta nomes de colunas do campeonato."""
-    if df is None: return None
-    df = df.copy()
+
+def estatisticas_uploads():
+    """Ocupação do cache de uploads, para exibir na Área Admin."""
+    return _cache_uploads.estatisticas()
+
+# --- SCHEMA COMPACTO ---
+# Rótulos repetidos viram categorias e a rodada cabe em int16. Os placares dos
+# jogos continuam float64: a regra dos 3 pontos compara a diferença exatamente
+# no limite de 3 e float32 mudaria empates em casos como 88.30 x 85.30.
+SCHEMA_CAMPEONATO = {
+    'Temporada': 'category', 'Competição': 'category',
+    'Mandante': 'category', 'Visitante': 'category',
+    'Rodada': 'int16',
+}
+SCHEMA_ESCALACOES = {
+    'Temporada': 'category', 'Atleta': 'category', 'Posição': 'category',
+    'Time': 'category', 'Cartoleiro': 'category', 'Capitao': 'category',
+    'Rodada': 'int16', 'Pontos': 'float32',
+}
+
+
+def aplicar_schema(df, schema):
+    """
+    Converte as colunas presentes para os tipos do schema. Linhas cuja rodada
+    não é numérica são descartadas (nenhum filtro de rodadas as alcançaria).
+    """
+    for col, tipo in schema.items():
+        if col not in df.columns:
+            continue
+        if tipo == 'category':
+            df[col] = df[col].astype('category')
+        elif tipo.startswith('int'):
+            valores = pd.to_numeric(df[col], errors='coerce')
+            if valores.isna().any():
+                df = df[valores.notna()].copy()
+                valores = valores.dropna()
+            info = np.iinfo(tipo)
+            if len(valores) and (valores.min() < info.min or valores.max() > info.max):
+                raise ValueError(f"Coluna '{col}' fora do intervalo de {tipo}.")
+            df[col] = valores.astype(tipo)
+        else:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype(tipo)
+    return df
+
+
+def ordenar(df):
+    """
+    Ordena por Temporada, Competição e Rodada (ordenação estável). Com a base
+    ordenada, utils.indexar consegue fatiar temporadas e rodadas por busca binária.
+    """
+    chaves = [c for c in ['Temporada', 'Competição', 'Rodada'] if c in df.columns]
+    return df.sort_values(chaves, kind='stable', ignore_index=True)
+
+
+def _herdar_assinatura(bruto, df, etapa):
+    """A padronização é determinística: a base padronizada herda a assinatura do arquivo bruto."""
+    valor = assinatura_registrada(bruto)
+    return assinar(df, f"{etapa}:{valor}") if valor is not None else df
+
+
+def _limpar_campeonato(df):
+    """Nomes de colunas e Temporada do campeonato (altera `df`; o schema vem depois)."""
     col_map = {'Competicao': 'Competição', 'Ano': 'Temporada'}
     df.rename(columns=col_map, inplace=True)
     
     if 'Competição' not in df.columns: df['Competição'] = 'Geral'
+    df['Competição'] = df['Competição'].fillna('Geral')  # Célula em branco: como se faltasse a coluna
     if 'Temporada' not in df.columns: df['Temporada'] = str(datetime.now().year)
 
     df = df.dropna(subset=['Temporada'])
     df['Temporada'] = df['Temporada'].astype(str).str.replace(r'\.0$', '', regex=True)
-    df = df[df['Temporada'].str.lower() != 'nan']
-    return df
+    return df[df['Temporada'].str.lower() != 'nan']
 
-def padronizar_escalacoes(df):
-    """Ajusta nomes de colunas das escalações e limpa dados."""
+
+@instrumentacao.medir('padronizacao')
+def padronizar_campeonato(df):
+    """Ajusta nomes de colunas do campeonato."""
     if df is None: return None
-    df = df.copy()
-    
+    bruto, df = df, _limpar_campeonato(df.copy())
+    return _herdar_assinatura(bruto, ordenar(aplicar_schema(df, SCHEMA_CAMPEONATO)), 'padronizar_campeonato')
+
+
+def _limpar_escalacoes(df):
+    """Nomes de colunas, Temporada e Rodada das escalações (altera `df`; o schema vem depois)."""
     # 1. Renomear (Normalização)
     mapa = {
         'Nome': 'Atleta', 'Posicao': 'Posição', 'Posição': 'Posição',
@@ -57,6 +312,312 @@ def padronizar_escalacoes(df):
         # Força conversão para numérico, transformando erros em NaN
         df['Rodada'] = pd.to_numeric(df['Rodada'], errors='coerce')
         df = df.dropna(subset=['Rodada']) # Remove linhas onde a rodada ficou inválida
-        df['Rodada'] = df['Rodada'].astype(int)
+    return df
+
+
+@instrumentacao.medir('padronizacao')
+def padronizar_escalacoes(df):
+    """Ajusta nomes de colunas das escalações e limpa dados."""
+    if df is None: return None
+    bruto, df = df, _limpar_escalacoes(df.copy())
+
+    # 4. Tipos compactos (categorias, int16, float32) e ordenação por temporada/rodada
+    return _herdar_assinatura(bruto, ordenar(aplicar_schema(df, SCHEMA_ESCALACOES)), 'padronizar_escalacoes')
+
+
+# --- CARGA EM BLOCOS (ARQUIVOS GRANDES) ---
+# CSV em pedaços (read_csv chunksize) e Excel linha a linha (openpyxl read_only).
+# Cada bloco é limpo e tipado assim que chega e vira uma tabela Arrow, com os
+# textos das colunas categóricas como dicionário. O pico de memória fica em um
+# bloco bruto mais a base já compacta, qualquer que seja o tamanho do arquivo.
+LINHAS_POR_BLOCO = 100_000
+MB_CARGA_EM_BLOCOS = 10  # Arquivos acima disso são lidos em blocos
+
+_LIMPEZA_EM_BLOCOS = {
+    padronizar_campeonato.__name__: (_limpar_campeonato, SCHEMA_CAMPEONATO),
+    padronizar_escalacoes.__name__: (_limpar_escalacoes, SCHEMA_ESCALACOES),
+}
+
+
+def _nomes_colunas(cabecalho):
+    """Cabeçalho da planilha com os mesmos nomes do read_excel ('Unnamed: 3', 'Pontuação.1')."""
+    nomes, vistos = [], {}
+    for i, valor in enumerate(cabecalho):
+        nome = f"Unnamed: {i}" if valor is None else str(valor).strip()
+        if nome in vistos:
+            vistos[nome] += 1
+            nome = f"{nome}.{vistos[nome]}"
+        vistos.setdefault(nome, 0)
+        nomes.append(nome)
+    return nomes
+
+
+def _blocos_excel(fonte, linhas_por_bloco):
+    """Primeira aba da planilha em DataFrames de até `linhas_por_bloco` linhas."""
+    livro = openpyxl.load_workbook(fonte, read_only=True, data_only=True)
+    try:
+        linhas = livro.worksheets[0].iter_rows(values_only=True)
+        cabecalho = next(linhas, None)
+        if cabecalho is None:
+            return
+        colunas = _nomes_colunas(cabecalho)
+        largura = len(colunas)
+        lote = []
+        for linha in linhas:
+            if all(v is None for v in linha):
+                continue
+            lote.append(linha[:largura] + (None,) * (largura - len(linha)))
+            if len(lote) == linhas_por_bloco:
+                yield pd.DataFrame(lote, columns=colunas)
+                lote = []
+        if lote:
+            yield pd.DataFrame(lote, columns=colunas)
+    finally:
+        livro.close()
+
+
+def _blocos_csv(fonte, linhas_por_bloco):
+    for bloco in pd.read_csv(fonte, chunksize=linhas_por_bloco):
+        bloco.columns = bloco.columns.str.strip()
+        yield bloco
+
+
+def _bloco_para_arrow(bloco, limpar, schema):
+    """Limpa e tipa um bloco; as colunas categóricas viram dicionário no Arrow."""
+    bloco = limpar(bloco)
+    categorias = [c for c, tipo in schema.items() if tipo == 'category' and c in bloco.columns]
+    bloco = aplicar_schema(bloco, {c: tipo for c, tipo in schema.items() if tipo != 'category'})
+    for c in categorias:
+        bloco[c] = bloco[c].astype('string')
+    tabela = pa.Table.from_pandas(utils.normalizar_colunas_mistas(bloco), preserve_index=False)
+    for c in categorias:
+        tabela = tabela.set_column(tabela.schema.get_field_index(c), c, pc.dictionary_encode(tabela[c]))
+    return tabela
+
+
+def _concatenar(tabelas):
+    """Junta os blocos. Uma coluna com tipos incompatíveis entre blocos (ex.: número e texto) vira texto."""
+    try:
+        return pa.concat_tables(tabelas, promote_options='permissive')
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        tipos = {}
+        for tabela in tabelas:
+            for campo in tabela.schema:
+                tipos.setdefault(campo.name, set()).add(campo.type)
+        conflito = {nome for nome, ts in tipos.items() if len(ts - {pa.null()}) > 1}
+        tabelas = [t.cast(pa.schema([pa.field(f.name, pa.string()) if f.name in conflito else f for f in t.schema]))
+                   for t in tabelas]
+        return pa.concat_tables(tabelas, promote_options='permissive')
+
+
+@instrumentacao.medir('carga')
+def carregar_em_blocos(fonte, padronizar, nome=None, linhas_por_bloco=LINHAS_POR_BLOCO):
+    """
+    Carga em blocos de um caminho ou arquivo aberto (`nome` indica o formato).
+    Devolve a mesma base que padronizar(carregar_arquivo(fonte)), sem nunca
+    montar a planilha bruta inteira em memória.
+    """
+    limpar, schema = _LIMPEZA_EM_BLOCOS[padronizar.__name__]
+    nome = nome or (fonte if isinstance(fonte, str) else getattr(fonte, 'name', ''))
+    blocos = _blocos_csv if nome.endswith('.csv') else _blocos_excel
+
+    tabelas = [_bloco_para_arrow(bloco, limpar, schema) for bloco in blocos(fonte, linhas_por_bloco)]
+    if not tabelas:
+        return padronizar(pd.DataFrame())
+    tabela = _concatenar(tabelas)
+    del tabelas
+    # Coluna sem nenhum valor vira float64 só com NaN, como no read_excel
+    tabela = tabela.cast(pa.schema([pa.field(f.name, pa.float64()) if pa.types.is_null(f.type) else f
+                                    for f in tabela.schema]))
+    df = _nulos_como_nan(tabela.to_pandas())
+    del tabela
+
+    # Categorias em ordem alfabética, como no astype('category') da carga inteira
+    for c, tipo in schema.items():
+        if tipo == 'category' and c in df.columns:
+            df[c] = df[c].cat.reorder_categories(sorted(df[c].cat.categories))
+    return ordenar(df)
+
+
+def _em_blocos(tamanho, padronizar):
+    """Arquivos grandes com padronização conhecida vão pela carga em blocos."""
+    return tamanho > MB_CARGA_EM_BLOCOS * 1024 * 1024 and padronizar.__name__ in _LIMPEZA_EM_BLOCOS
 
+
+def _padronizar_em_blocos(caminho, mtime, tamanho, padronizar):
+    """
+    padronizar(_ler_caminho(...)) para arquivos grandes: usa o snapshot da base
+    padronizada quando existe (arquivo próprio, separado do snapshot cru); senão
+    carrega em blocos e grava esse snapshot. Sai com a mesma assinatura do
+    caminho sem blocos.
+    """
+    etapa = padronizar.__name__
+    origem = {'mtime': mtime, 'tamanho': tamanho}
+    df = _ler_snapshot(caminho, origem, etapa)
+    if df is None:
+        df = carregar_em_blocos(caminho, padronizar)
+        origem['sha1'] = origem.get('sha1') or _hash_arquivo(caminho)
+        _gravar_snapshot(caminho, df, origem, etapa)
+    return assinar(df, f"{etapa}:{origem['sha1']}") if origem.get('sha1') else df
+
+
+# --- DELTAS (NOVA RODADA OU TEMPORADA) ---
+# Uma rodada ou temporada nova entra como delta: substitui as linhas de mesma
+# chave e fica gravada ao lado da planilha (.<planilha>.delta.feather), aplicada
+# por cima dela a cada carga. A base resultante registra as temporadas tocadas
+# (cache.registrar_origem) e o analytics só recalcula os agregados delas.
+CHAVES_DELTA = {
+    padronizar_campeonato.__name__: ['Temporada', 'Competição', 'Rodada', 'Mandante', 'Visitante'],
+    padronizar_escalacoes.__name__: ['Temporada', 'Rodada', 'Time'],  # A escalação inteira do time na rodada
+}
+# Colunas de valor que o delta precisa trazer com os mesmos nomes da base (o placar tem dois esquemas)
+VALORES_DELTA = {
+    padronizar_campeonato.__name__: ['Pontuação', 'Pontuação.1', 'Pontuacao_Mandante', 'Pontuacao_Visitante'],
+    padronizar_escalacoes.__name__: ['Posição', 'Atleta'],
+}
+MAX_MB_BASES_COM_DELTA = 1024
+
+_bases_com_delta = CacheLRU(MAX_BASES_COMPARTILHADAS, MAX_MB_BASES_COM_DELTA * 1024 * 1024)
+
+
+def _caminho_deltas(caminho):
+    pasta, nome = os.path.split(os.path.abspath(caminho))
+    return os.path.join(pasta, f".{nome}.delta.feather")
+
+
+def _ler_deltas(caminho):
+    arquivo = _caminho_deltas(caminho)
+    if not os.path.exists(arquivo):
+        return None
+    try:
+        return _de_arrow(arquivo)
+    except (OSError, pa.ArrowException):
+        return None
+
+
+def _gravar_deltas(caminho, deltas):
+    """Grava num temporário e troca: uma sessão lendo nunca vê o arquivo pela metade."""
+    destino = _caminho_deltas(caminho)
+    deltas = deltas.copy(deep=False)
+    deltas.attrs = {}  # Assinatura e origem valem só neste processo
+    feather.write_feather(pa.Table.from_pandas(deltas, preserve_index=False), destino + '.tmp',
+                          compression='uncompressed')
+    os.replace(destino + '.tmp', destino)
+
+
+def validar_delta(base, delta, padronizar):
+    """
+    Motivo pelo qual o delta não encaixa na base (texto), ou None se encaixa: as
+    colunas de chave e de valor precisam ser as mesmas da base padronizada. Pega
+    uma planilha de escalações enviada como jogos e o outro esquema de placar.
+    """
+    if delta is None or delta.empty:
+        return "o delta está vazio ou não pôde ser lido"
+    colunas = CHAVES_DELTA[padronizar.__name__] + VALORES_DELTA[padronizar.__name__]
+    faltando = [c for c in colunas if c in base.columns and c not in delta.columns]
+    sobrando = [c for c in colunas if c in delta.columns and c not in base.columns]
+    if faltando or sobrando:
+        return "colunas diferentes das da base" + \
+            (f"; faltam: {', '.join(faltando)}" if faltando else "") + \
+            (f"; não existem na base: {', '.join(sobrando)}" if sobrando else "")
+    return None
+
+
+def mesclar_delta(base, delta, padronizar):
+    """
+    Base com o delta aplicado (ambos já padronizados). Jogos do delta substituem
+    os de mesma chave (Temporada, Competição, Rodada, Mandante, Visitante); nas
+    escalações, a escalação de um time numa rodada substitui a anterior inteira.
+    """
+    chaves = [c for c in CHAVES_DELTA[padronizar.__name__] if c in base.columns and c in delta.columns]
+    if padronizar.__name__ == padronizar_campeonato.__name__:
+        delta = delta.drop_duplicates(chaves, keep='last')
+    substituidas = pd.MultiIndex.from_frame(base[chaves]).isin(pd.MultiIndex.from_frame(delta[chaves]))
+
+    df = ordenar(utils.concatenar([base[~substituidas], delta]))
+    assinar(df, f"{assinatura(base)}+{assinatura(delta)}")
+    return registrar_origem(df, assinatura(base), delta['Temporada'].dropna().unique().tolist())
+
+
+def _com_deltas(caminho, base, padronizar):
+    """A base do arquivo com os deltas gravados, montada uma vez por versão do arquivo de deltas."""
+    arquivo = _caminho_deltas(caminho)
+    if base is None or not os.path.exists(arquivo):
+        return base
+    info = os.stat(arquivo)
+    chave = (assinatura(base), padronizar.__name__, info.st_mtime_ns, info.st_size)
+    df = _bases_com_delta.obter(chave)
+    if df is None:
+        deltas = _ler_deltas(caminho)
+        # Um arquivo de deltas que não encaixa (gravado antes da validação) é ignorado
+        valido = deltas is not None and validar_delta(base, deltas, padronizar) is None
+        df = mesclar_delta(base, deltas, padronizar) if valido else base
+        df = _bases_com_delta.guardar(chave, congelar(df))
     return df
+
+
+def versao_base(caminho):
+    """mtime e tamanho da planilha e dos seus deltas: muda sempre que carregar_base mudaria."""
+    versao = []
+    for arquivo in (caminho, _caminho_deltas(caminho)):
+        try:
+            info = os.stat(arquivo)
+            versao.append((info.st_mtime_ns, info.st_size))
+        except OSError:
+            versao.append(None)
+    return tuple(versao)
+
+
+@instrumentacao.medir('carga')
+def carregar_delta(arquivo, padronizar):
+    """Lê um delta enviado já padronizado: CSV ou Excel com uma ou mais abas (ex.: uma por rodada)."""
+    try:
+        conteudo = io.BytesIO(arquivo.getvalue())
+        abas = [pd.read_csv(conteudo)] if arquivo.name.endswith('.csv') else \
+            list(pd.read_excel(conteudo, sheet_name=None).values())
+        partes = []
+        for aba in abas:
+            aba.columns = aba.columns.astype(str).str.strip()
+            if not aba.empty:
+                partes.append(padronizar(utils.normalizar_colunas_mistas(aba)))
+        return ordenar(utils.concatenar(partes)) if partes else None
+    except Exception:
+        return None
+
+
+@instrumentacao.medir('carga')
+def aplicar_delta(caminho, delta, padronizar):
+    """
+    Aplica um delta padronizado (carregar_delta) à base compartilhada do arquivo
+    e o grava junto aos deltas anteriores. Devolve (nova base, None), ou
+    (None, motivo) se não houver base, se o delta não encaixar nela
+    (validar_delta) ou se não for possível gravar.
+    """
+    atual = carregar_base(caminho, padronizar)
+    if atual is None:
+        return None, "a base não foi encontrada"
+    motivo = validar_delta(atual, delta, padronizar)
+    if motivo is not None:
+        return None, motivo
+    anteriores = _ler_deltas(caminho)
+    if anteriores is not None and validar_delta(atual, anteriores, padronizar) is not None:
+        anteriores = None  # Deltas antigos que não encaixam são substituídos
+    try:
+        _gravar_deltas(caminho, delta if anteriores is None else mesclar_delta(anteriores, delta, padronizar))
+    except (OSError, pa.ArrowException) as erro:
+        return None, f"não foi possível gravar o delta ({erro})"
+
+    # A nova base nasce do que já estava em uso, assim os agregados dela são reaproveitados
+    info = os.stat(_caminho_deltas(caminho))
+    chave = (assinatura(_base_do_arquivo(caminho, padronizar)), padronizar.__name__, info.st_mtime_ns, info.st_size)
+    return _bases_com_delta.guardar(chave, congelar(mesclar_delta(atual, delta, padronizar))), None
+
+
+def descartar_deltas(caminho):
+    """Apaga os deltas gravados da planilha: a próxima carga volta à planilha pura. True se havia deltas."""
+    try:
+        os.remove(_caminho_deltas(caminho))
+    except FileNotFoundError:
+        return False
+    _bases_com_delta.limpar()
+    return True
@@ -1,16 +1,7 @@
 import streamlit as st
-import os
-import base64
 import streamlit.components.v1 as components
 
-def get_base64_of_bin_file(bin_file):
-    """Função auxiliar para ler a imagem e transformar em texto para o HTML."""
-    try:
-        with open(bin_file, 'rb') as f:
-            data = f.read()
-        return base64.b64encode(data).decode()
-    except FileNotFoundError:
-        return None
+from modules import assets
 
 def render_page():
     # Inicializa o estado se não existir
@@ -20,12 +11,11 @@ def render_page():
     # --- CABEÇALHO (HERO SECTION COM FUNDO LARANJA) ---
     st.markdown("<div style='padding-top: 1rem;'></div>", unsafe_allow_html=True)
 
-    # 1. Prepara a imagem (Logo ou Cartola)
+    # 1. Prepara a imagem (Logo ou Cartola): reduzida uma vez por processo (2x os 250px, para telas retina)
     img_html = ""
-    if os.path.exists("logo.png"):
-        img_b64 = get_base64_of_bin_file("logo.png")
-        if img_b64:
-            img_html = f'<img src="data:image/png;base64,{img_b64}" style="width: 250px; display: block; margin: 0 auto;">'
+    img_src = assets.url_imagem("logo.png", 500)
+    if img_src:
+        img_html = f'<img src="{img_src}" style="width: 250px; display: block; margin: 0 auto;">'
 
     # Se não tiver logo, usa o emoji
     if not img_html:
@@ -100,10 +90,9 @@ def render_page():
         # FOTO DA DIRETORIA
         c_img_e, c_img_c, c_img_d = st.columns([1, 4, 1])
         with c_img_c:
-            if os.path.exists("diretoria.jpg"):
-                st.image("diretoria.jpg", caption="A Elite Reunida: Diretoria Cartolendários 2026", use_container_width=True)
-            elif os.path.exists("diretoria.png"):
-                st.image("diretoria.png", caption="A Elite Reunida: Diretoria Cartolendários 2026", use_container_width=True)
+            foto = assets.imagem("diretoria.jpg", 1280) or assets.imagem("diretoria.png", 1280)
+            if foto:
+                st.image(foto, caption="A Elite Reunida: Diretoria Cartolendários 2026", use_container_width=True)
             else:
                 st.info("Imagem da diretoria (diretoria.jpg) não encontrada.")
 
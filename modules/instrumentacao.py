@@ -0,0 +1,133 @@
+"""
+Instrumentação opcional do caminho quente (sem Streamlit). Desligada, cada
+função decorada custa só a checagem de uma flag. Ligada, cada chamada registra
+tempo, linhas de entrada/saída, acerto de cache (funções memorizadas) e, se a
+medição de memória estiver ligada, a variação de memória alocada (tracemalloc).
+
+Liga pela Área Admin ou pela variável de ambiente CARTOLENDARIOS_INSTRUMENTACAO=1.
+Os registros ficam num buffer circular do processo (todas as sessões).
+"""
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+MAX_REGISTROS = 20000
+
+_registros = deque(maxlen=MAX_REGISTROS)
+_lock = threading.Lock()
+_ativa = os.environ.get('CARTOLENDARIOS_INSTRUMENTACAO', '') == '1'
+
+
+def ativa():
+    return _ativa
+
+
+def medindo_memoria():
+    return tracemalloc.is_tracing()
+
+
+def ativar(ligada=True, memoria=False):
+    """Liga/desliga a instrumentação. A medição de memória (tracemalloc) deixa tudo mais lento."""
+    global _ativa
+    _ativa = ligada
+    if ligada and memoria and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    elif (not ligada or not memoria) and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def limpar():
+    with _lock:
+        _registros.clear()
+
+
+def _linhas(obj):
+    return len(obj) if isinstance(obj, (pd.DataFrame, pd.Series)) else None
+
+
+def registrar(funcao, etapa, segundos, linhas_entrada=None, linhas_saida=None, cache=None, memoria=None):
+    """Guarda uma chamada medida. `cache` é 'hit', 'miss' ou None (função sem cache)."""
+    with _lock:
+        _registros.append({
+            'ts': round(time.time(), 3), 'funcao': funcao, 'etapa': etapa, 'segundos': segundos,
+            'linhas_entrada': linhas_entrada, 'linhas_saida': linhas_saida, 'cache': cache, 'memoria': memoria,
+        })
+
+
+class _Medicao:
+    """Mede um trecho (tempo e, se ligado, memória); usado pelo decorador e pelos caches."""
+
+    def __init__(self):
+        self.ini = time.perf_counter()
+        self.mem_ini = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+
+    def fechar(self, funcao, etapa, entrada=None, saida=None, cache=None):
+        segundos = time.perf_counter() - self.ini
+        memoria = None
+        if self.mem_ini is not None and tracemalloc.is_tracing():
+            memoria = tracemalloc.get_traced_memory()[0] - self.mem_ini
+        registrar(funcao, etapa, segundos, _linhas(entrada), _linhas(saida), cache, memoria)
+
+
+def iniciar():
+    """Começa uma medição manual (None se a instrumentação estiver desligada)."""
+    return _Medicao() if _ativa else None
+
+
+def medir(etapa):
+    """
+    Decorador: registra cada chamada com o nome `modulo.funcao` na `etapa`
+    (carga, padronizacao, filtro, processamento, ranking ou render).
+    """
+    def decorador(func):
+        nome = f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+
+        @functools.wraps(func)
+        def medida(*args, **kwargs):
+            if not _ativa:
+                return func(*args, **kwargs)
+            med = _Medicao()
+            resultado = func(*args, **kwargs)
+            med.fechar(nome, etapa, args[0] if args else None, resultado)
+            return resultado
+        return medida
+    return decorador
+
+
+def registros():
+    with _lock:
+        return list(_registros)
+
+
+def resumo():
+    """Percentis por função: chamadas, p50/p90/p99 em ms, linhas, hits/misses e memória."""
+    df = pd.DataFrame(registros())
+    if df.empty:
+        return pd.DataFrame()
+
+    linhas = []
+    for (funcao, etapa), g in df.groupby(['funcao', 'etapa'], sort=False):
+        ms = g['segundos'].to_numpy() * 1000
+        p50, p90, p99 = np.percentile(ms, [50, 90, 99])
+        memoria = pd.to_numeric(g['memoria'], errors='coerce').dropna()
+        linhas.append({
+            'Função': funcao, 'Etapa': etapa, 'Chamadas': len(g),
+            'p50 (ms)': p50, 'p90 (ms)': p90, 'p99 (ms)': p99, 'Total (s)': ms.sum() / 1000,
+            'Linhas (mediana)': pd.to_numeric(g['linhas_saida'].fillna(g['linhas_entrada']),
+                                              errors='coerce').median(),
+            'Hits': int((g['cache'] == 'hit').sum()), 'Misses': int((g['cache'] == 'miss').sum()),
+            'Memória p90 (MB)': np.percentile(memoria, 90) / 1024 ** 2 if len(memoria) else np.nan,
+        })
+    return pd.DataFrame(linhas).sort_values('Total (s)', ascending=False, ignore_index=True)
+
+
+def exportar_jsonl():
+    """Todos os registros do buffer, um JSON por linha."""
+    return ''.join(json.dumps(r, ensure_ascii=False) + '\n' for r in registros())
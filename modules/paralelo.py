@@ -0,0 +1,193 @@
+"""
+Processamento por temporada em paralelo (sem Streamlit), para as visões de
+todas as temporadas: Classificação e Hall da Fama históricos dos jogos e os
+atletas mais escalados de todos os tempos.
+
+A base é dividida nos blocos Temporada/Competição de utils.indexar (blocos
+pequenos da mesma temporada são juntados numa tarefa, pois cada chamada do
+pandas tem um custo fixo); cada tarefa vira um agregado parcial pequeno e os
+parciais são mesclados aqui. No modo paralelo a base vai uma vez para um
+arquivo Arrow (IPC, sem compressão) e cada processo do pool o abre por
+memory-map e converte só o seu trecho (Table.slice não copia): nenhum
+DataFrame grande passa por pickle, só os offsets na ida e os parciais na volta.
+
+Bases pequenas rodam as mesmas tarefas em sequência, no próprio processo: subir
+o pool custa mais que o ganho. O número de processos vem da variável de
+ambiente CARTOLENDARIOS_PROCESSOS (padrão: um por núcleo; 1 desliga o pool).
+"""
+import atexit
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import pyarrow as pa
+
+from modules import instrumentacao, utils
+
+PROCESSOS = int(os.environ.get('CARTOLENDARIOS_PROCESSOS') or 0) or os.cpu_count() or 1
+MIN_LINHAS_PARALELO = 200_000  # Abaixo disso a base é processada em sequência
+LINHAS_POR_TAREFA = 25_000  # Blocos menores da mesma temporada são juntados numa tarefa
+LIMITE_HALL = 50
+
+COLUNAS_JOGOS = ['Temporada', 'Competição', 'Rodada', 'Mandante', 'Visitante',
+                 'Pontuação', 'Pontuação.1', 'Pontuacao_Mandante', 'Pontuacao_Visitante']
+COLUNAS_ESCALACOES = utils.CHAVES_CUBO + ['Capitao']
+COLUNAS_HALL = ['Temporada', 'Time', 'Pontuação', 'Rodada', 'Adversário', 'Competição']
+
+_lock = threading.Lock()
+_pool = None
+_pasta = None
+
+
+# --- POOL E ARQUIVOS ARROW ---
+
+def _encerrar():
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+    if _pasta is not None:
+        shutil.rmtree(_pasta, ignore_errors=True)
+
+
+def _executor():
+    """Pool de processos do módulo, criado no primeiro uso (com a pasta dos arquivos Arrow)."""
+    global _pool, _pasta
+    with _lock:
+        if _pool is None:
+            # spawn: o processo do Streamlit tem threads, e um fork herdaria locks presos
+            _pool = ProcessPoolExecutor(PROCESSOS, mp_context=multiprocessing.get_context('spawn'))
+            _pasta = tempfile.mkdtemp(prefix='cartolendarios-')
+            atexit.register(_encerrar)
+        return _pool
+
+
+def _gravar_arrow(df):
+    """Grava a base num arquivo Arrow IPC temporário, sem compressão (lido por memory-map nos processos)."""
+    tabela = pa.Table.from_pandas(utils.normalizar_colunas_mistas(df), preserve_index=False)
+    fd, caminho = tempfile.mkstemp(suffix='.arrow', dir=_pasta)
+    with os.fdopen(fd, 'wb') as arquivo, pa.ipc.new_file(arquivo, tabela.schema) as escritor:
+        escritor.write_table(tabela)
+    return caminho
+
+
+def _no_processo(parcial, caminho, ini, fim, *args):
+    """Roda num processo do pool: só o trecho ini:fim sai do memory-map e vira DataFrame."""
+    tabela = pa.ipc.open_file(pa.memory_map(caminho)).read_all()
+    return parcial(tabela.slice(ini, fim - ini).to_pandas(), *args)
+
+
+def _tarefas(indice):
+    """(temporada, ini, fim) das tarefas: blocos Temporada/Competição vizinhos juntados até LINHAS_POR_TAREFA."""
+    tarefas = []
+    for temp, comps in indice.items():
+        ini_tarefa = None
+        for ini, fim in comps.values():  # Na base ordenada os blocos de uma temporada são contíguos
+            ini_tarefa = ini if ini_tarefa is None else ini_tarefa
+            if fim - ini_tarefa >= LINHAS_POR_TAREFA:
+                tarefas.append((temp, ini_tarefa, fim))
+                ini_tarefa = None
+        if ini_tarefa is not None:
+            tarefas.append((temp, ini_tarefa, fim))
+    return tarefas
+
+
+def _processar(df, indice, colunas, paralelo, parcial, *args):
+    """
+    [(temporada, parcial(trecho, *args))] de cada tarefa (ver _tarefas), na
+    ordem da base. paralelo=None decide pelo tamanho da base e pelo número de
+    processos; True/False força um dos modos.
+    """
+    blocos = _tarefas(indice)
+    if paralelo is None:
+        paralelo = PROCESSOS > 1 and len(blocos) > 1 and len(df) >= MIN_LINHAS_PARALELO
+    if not paralelo:
+        return [(temp, parcial(df.iloc[ini:fim], *args)) for temp, ini, fim in blocos]
+
+    pool = _executor()
+    caminho = _gravar_arrow(df[[c for c in colunas if c in df.columns]])
+    try:
+        futuros = [pool.submit(_no_processo, parcial, caminho, ini, fim, *args) for _, ini, fim in blocos]
+        return [(temp, futuro.result()) for (temp, _, _), futuro in zip(blocos, futuros)]
+    finally:
+        try:
+            os.remove(caminho)
+        except OSError:
+            pass  # No Windows o arquivo pode seguir mapeado; a pasta é apagada na saída
+
+
+# --- JOGOS: CLASSIFICAÇÃO E HALL DA FAMA DE TODAS AS TEMPORADAS ---
+
+def _parcial_jogos(jogos, limite):
+    """Somas de cada time e as `limite` maiores pontuações de um trecho (uma temporada ou parte dela)."""
+    df_atuacoes = utils.gerar_atuacoes(jogos)
+    if df_atuacoes.empty:
+        return None
+    hall = df_atuacoes.rename(columns={'Placar': 'Pontuação', 'Adv': 'Adversário'})[COLUNAS_HALL]
+    hall = utils.top_k(hall, 'Pontuação', limite, unicos=['Temporada', 'Time', 'Rodada'])
+    return utils.resumo_por_time(df_atuacoes), hall
+
+
+def _classificacao_historica(tabelas):
+    """Soma as campanhas de cada time em todos os trechos (acabamento de utils.ordenar_classificacao)."""
+    if not tabelas:
+        return pd.DataFrame()
+    tb = pd.concat([t for _, t in tabelas]).groupby(level='Time', sort=True).sum()
+    temporadas = pd.concat([pd.Series(temp, index=t.index) for temp, t in tabelas]).groupby(level='Time').nunique()
+    return utils.ordenar_classificacao(tb.assign(Temporadas=temporadas).reset_index())
+
+
+@instrumentacao.medir('processamento')
+def historico_campeonato(df_camp, indice=None, limite=LIMITE_HALL, paralelo=None):
+    """
+    Classificação de todas as temporadas somadas (com quantas temporadas cada
+    time jogou) e Hall da Fama de todos os tempos (as `limite` maiores
+    pontuações, uma por time e rodada de cada temporada): (tabela, hall).
+    """
+    if df_camp is None or df_camp.empty:
+        return pd.DataFrame(), pd.DataFrame()
+    indice = utils.indexar(df_camp) if indice is None else indice
+    parciais = [(temp, p) for temp, p in _processar(df_camp, indice, COLUNAS_JOGOS, paralelo,
+                                                     _parcial_jogos, limite) if p is not None]
+    if not parciais:
+        return pd.DataFrame(), pd.DataFrame()
+
+    # O melhor de cada temporada/time/rodada está entre os `limite` melhores do seu trecho
+    hall = utils.concatenar([h for _, (_, h) in parciais])
+    hall = utils.top_k(hall, 'Pontuação', limite, unicos=['Temporada', 'Time', 'Rodada']).reset_index(drop=True)
+    return _classificacao_historica([(temp, tb) for temp, (tb, _) in parciais]), hall
+
+
+# --- ESCALAÇÕES: MAIS ESCALADOS DE TODOS OS TEMPOS ---
+
+def _parcial_escalacoes(esc):
+    """Escalações e capitanias de cada atleta num trecho (uma temporada)."""
+    cubo = utils.cubo_escalacoes(esc)
+    return cubo.groupby(['Atleta', 'Posição'], observed=True)[['Escalações', 'Vezes_Capitao']].sum().reset_index()
+
+
+@instrumentacao.medir('processamento')
+def historico_escalacoes(df_esc, indice=None, limite=LIMITE_HALL, paralelo=None):
+    """
+    Atletas mais escalados de todas as temporadas (com em quantas apareceram) e
+    os capitães mais escolhidos: {'queridinhos': ..., 'capitaes': ...}.
+    """
+    vazio = {'queridinhos': pd.DataFrame(), 'capitaes': pd.DataFrame()}
+    if df_esc is None or df_esc.empty or any(c not in df_esc.columns for c in utils.CHAVES_CUBO):
+        return vazio
+    indice = utils.indexar(df_esc) if indice is None else indice
+    parciais = [p for _, p in _processar(df_esc, indice, COLUNAS_ESCALACOES, paralelo, _parcial_escalacoes)]
+    if not parciais:
+        return vazio
+
+    total = utils.concatenar(parciais).groupby(['Atleta', 'Posição'], observed=True).agg(
+        Escalações=('Escalações', 'sum'), Vezes_Capitao=('Vezes_Capitao', 'sum'),
+        Temporadas=('Escalações', 'size')).reset_index()
+    queridinhos = utils.top_k(total, 'Escalações', limite)[['Atleta', 'Posição', 'Escalações', 'Temporadas']]
+
+    capitaes = total.groupby('Atleta', observed=True)['Vezes_Capitao'].sum()
+    capitaes = utils.top_k(capitaes[capitaes > 0], None, limite).reset_index()
+    capitaes.columns = ['Atleta', 'Vezes']
+    return {'queridinhos': queridinhos.reset_index(drop=True), 'capitaes': capitaes}
@@ -0,0 +1,120 @@
+"""
+Pré-cálculo em segundo plano (sem Streamlit): assim que uma base entra no
+processo (boot do app, upload na Área Admin ou servidor da API), uma thread
+calcula o que as abas pedem com os filtros padrão e deixa tudo nos caches do
+modules.analytics. A primeira visita vira uma consulta ao cache.
+
+Só a temporada mais recente (a que abre na barra lateral e recebe quase todo o
+acesso), com a janela padrão de rodadas (a temporada inteira): classificação e
+Raio-X de cada competição, Lendas e a classificação e o Raio-X de "Todas" e,
+havendo escalações, o painel da última rodada. O histórico de todas as
+temporadas fica de fora: ele sobe o pool de processos do modules.paralelo, que
+no boot disputaria a CPU com as primeiras sessões. O pré-cálculo ocupa no máximo FRACAO_DO_CACHE do cache de
+análises, e os filtros padrão são calculados por último: no LRU, são os
+últimos a sair.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from modules import analytics
+from modules.cache import assinatura, tamanho_em_bytes
+
+MAX_THREADS = 1  # Uma só: o pré-cálculo não deve disputar CPU com as sessões
+FRACAO_DO_CACHE = 0.25  # Itens e bytes do cache de análises que o pré-cálculo pode ocupar
+
+_executor = ThreadPoolExecutor(max_workers=MAX_THREADS, thread_name_prefix='preaquecimento')
+_lock = threading.Lock()
+_agendadas = set()
+_estado = {'pendentes': 0, 'concluidas': 0, 'erros': 0, 'ultimo_erro': None}
+
+
+def estado():
+    """Tarefas pendentes, concluídas e com erro, para exibir na Área Admin."""
+    with _lock:
+        return dict(_estado)
+
+
+def _janela(df, temporada):
+    rodadas = analytics.rodadas(df, temporada)
+    return int(rodadas[0]), int(rodadas[-1])
+
+
+def _cabe(gasto, itens):
+    """Se mais `itens` resultados ainda cabem na fração do cache reservada ao pré-cálculo."""
+    stats = analytics.estatisticas()
+    return (gasto['itens'] + itens <= stats['max_itens'] * FRACAO_DO_CACHE
+            and gasto['bytes'] <= stats['max_bytes'] * FRACAO_DO_CACHE)
+
+
+def _calcular(gasto, func, *args):
+    gasto['itens'] += 1
+    gasto['bytes'] += tamanho_em_bytes(func(*args))
+
+
+def preaquecer_campeonato(df_camp):
+    """
+    Raio-X e classificação das competições (enquanto couberem no cache) e,
+    por último, os filtros padrão da temporada mais recente: Lendas,
+    classificação e Raio-X de "Todas", com as mesmas chaves do app.
+    """
+    indice = analytics.indice(df_camp)
+    temp = max(indice)
+    r_ini, r_fim = _janela(df_camp, temp)
+    padrao = [(analytics.lendas, temp, r_ini, r_fim), (analytics.rodadas, temp, None),
+              (analytics.classificacao, temp, None, r_ini, r_fim), (analytics.raio_x, temp, None, r_ini, r_fim)]
+
+    gasto = {'itens': 0, 'bytes': 0}
+    for comp in sorted(indice[temp]):
+        if not _cabe(gasto, 3 + len(padrao)):
+            break
+        _calcular(gasto, analytics.rodadas, df_camp, temp, comp)
+        _calcular(gasto, analytics.classificacao, df_camp, temp, comp, r_ini, r_fim)
+        _calcular(gasto, analytics.raio_x, df_camp, temp, comp, r_ini, r_fim)
+    for func, *args in padrao:
+        func(df_camp, *args)
+
+
+def preaquecer_escalacoes(df_esc):
+    """Cubo das escalações e o painel da última rodada da temporada mais recente."""
+    temp = max(analytics.indice(df_esc))
+    analytics.top_escalacoes(df_esc, temp, int(analytics.rodadas(df_esc, temp)[-1]))
+
+
+def _executar(carregar, preaquecer):
+    try:
+        df = carregar()
+        if df is not None and not df.empty:
+            preaquecer(df)
+        resultado = 'concluidas'
+    except Exception as e:  # O pré-cálculo nunca derruba nada: no pior caso a aba calcula na hora
+        resultado = 'erros'
+        with _lock:
+            _estado['ultimo_erro'] = f"{preaquecer.__name__}: {e}"
+    with _lock:
+        _estado['pendentes'] -= 1
+        _estado[resultado] += 1
+
+
+def agendar_carga(origem, carregar, preaquecer):
+    """
+    Enfileira a carga de uma base e o pré-cálculo dela (preaquecer_campeonato ou
+    preaquecer_escalacoes), uma vez por `origem`, que identifica a versão da base
+    (ex.: file_id do upload ou data.versao_base do arquivo). Não bloqueia:
+    `carregar` roda na thread, então a aba 3 continua sem carregar as escalações
+    enquanto está fechada.
+    """
+    chave = (preaquecer.__name__, origem)
+    with _lock:
+        if chave in _agendadas:
+            return False
+        _agendadas.add(chave)
+        _estado['pendentes'] += 1
+    _executor.submit(_executar, carregar, preaquecer)
+    return True
+
+
+def agendar(df_camp):
+    """Enfileira o pré-cálculo de uma base de jogos já carregada (uma vez por assinatura)."""
+    if df_camp is None or df_camp.empty:
+        return False
+    return agendar_carga(assinatura(df_camp), lambda: df_camp, preaquecer_campeonato)
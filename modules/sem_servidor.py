@@ -0,0 +1,12 @@
+"""
+Uso dos módulos fora do servidor do Streamlit (modules.api e benchmarks).
+"""
+from streamlit import logger as st_logger
+
+
+def silenciar_streamlit():
+    """
+    Fora do servidor o st.cache_data avisa (na importação e a cada chamada) que
+    não há runtime. Chamar antes de importar os módulos que usam o cache.
+    """
+    st_logger.set_log_level('error')
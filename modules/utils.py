@@ -1,101 +1,460 @@
+import numpy as np
 import pandas as pd
 
+from modules import instrumentacao
 
-def processar_jogos(df):
-    """Aplica a regra dos 3 pontos e gera tabela de resultados."""
-    lst = []
-    for _, r in df.iterrows():
+
+def _para_float(serie):
+    """Converte placares como o float() da versão linha a linha: nulo vira 0.0 e
+    valores que o float() rejeita marcam a linha como inválida."""
+    nulos = serie.isna().to_numpy()
+    valores = pd.to_numeric(serie, errors='coerce').to_numpy(dtype=float, na_value=np.nan, copy=True)
+    validos = np.ones(len(serie), dtype=bool)
+
+    # O to_numeric é mais restrito que o float() (ex.: espaços), então as
+    # falhas dele são conferidas uma a uma - costumam ser pouquíssimas
+    for pos in np.flatnonzero(np.isnan(valores) & ~nulos):
         try:
-            cm = 'Pontuação' if 'Pontuação' in r else 'Pontuacao_Mandante'
-            cv = 'Pontuação.1' if 'Pontuação.1' in r else 'Pontuacao_Visitante'
-            if cm not in r: cm = 'Pontuacao_Mandante'
-            if cv not in r: cv = 'Pontuacao_Visitante'
-
-            pm = float(r[cm]) if pd.notnull(r[cm]) else 0.0
-            pv = float(r[cv]) if pd.notnull(r[cv]) else 0.0
-
-            diff = abs(pm - pv)
-
-            if diff <= 3:
-                rm, rv = (1, 'E'), (1, 'E')
-            elif pm > pv:
-                rm, rv = (3, 'V'), (0, 'D')
-            else:
-                rm, rv = (0, 'D'), (3, 'V')
-
-            base = {'Rodada': r['Rodada'], 'Time': r['Mandante'], 'Adv': r['Visitante'],
-                    'Pts': rm[0], 'Res': rm[1], 'Placar': pm, 'Placar_Adv': pv,
-                    'Competição': r.get('Competição', 'Geral')}
-
-            lst.append(base)
-            lst.append({**base, 'Time': r['Visitante'], 'Adv': r['Mandante'],
-                        'Pts': rv[0], 'Res': rv[1], 'Placar': pv, 'Placar_Adv': pm})
-        except:
+            valores[pos] = float(serie.iat[pos])
+        except (TypeError, ValueError):
+            validos[pos] = False
+
+    valores[nulos] = 0.0
+    return valores, validos
+
+
+@instrumentacao.medir('processamento')
+def gerar_atuacoes(df_camp):
+    """
+    Transforma os jogos em uma tabela longa de atuações (uma linha por time por jogo),
+    já com a regra dos 3 pontos aplicada. É a base da classificação e do Hall da Fama.
+    """
+    # Resolve o esquema das colunas de placar uma única vez
+    cm = 'Pontuação' if 'Pontuação' in df_camp.columns else 'Pontuacao_Mandante'
+    cv = 'Pontuação.1' if 'Pontuação.1' in df_camp.columns else 'Pontuacao_Visitante'
+    if any(c not in df_camp.columns for c in [cm, cv, 'Rodada', 'Mandante', 'Visitante']):
+        return pd.DataFrame()
+
+    pm, ok_m = _para_float(df_camp[cm])
+    pv, ok_v = _para_float(df_camp[cv])
+    ok = ok_m & ok_v  # Linhas malformadas são ignoradas
+    if not ok.any():
+        return pd.DataFrame()
+    pm, pv = pm[ok], pv[ok]
+
+    # Regra dos 3 pontos: diferença de até 3 é empate
+    empate = np.abs(pm - pv) <= 3
+    vence_m = ~empate & (pm > pv)
+    pts_m = np.where(empate, 1, np.where(vence_m, 3, 0)).astype(np.int8)
+    pts_v = np.where(empate, 1, np.where(vence_m, 0, 3)).astype(np.int8)
+    res_m = np.where(empate, 'E', np.where(vence_m, 'V', 'D'))
+    res_v = np.where(empate, 'E', np.where(vence_m, 'D', 'V'))
+
+    jogos = df_camp[ok]
+    temp = jogos['Temporada'].to_numpy() if 'Temporada' in jogos.columns else None
+    comp = jogos['Competição'].to_numpy() if 'Competição' in jogos.columns else 'Geral'
+    mandante = jogos['Mandante'].to_numpy()
+    visitante = jogos['Visitante'].to_numpy()
+    rodada = jogos['Rodada'].to_numpy()
+
+    # Mandante nas posições pares e visitante nas ímpares (ordem original dos jogos)
+    pos = np.arange(len(jogos)) * 2
+    casa = pd.DataFrame({'Temporada': temp, 'Rodada': rodada, 'Time': mandante, 'Adv': visitante,
+                         'Pts': pts_m, 'Res': res_m, 'Placar': pm, 'Placar_Adv': pv,
+                         'Competição': comp}, index=pos)
+    fora = pd.DataFrame({'Temporada': temp, 'Rodada': rodada, 'Time': visitante, 'Adv': mandante,
+                         'Pts': pts_v, 'Res': res_v, 'Placar': pv, 'Placar_Adv': pm,
+                         'Competição': comp}, index=pos + 1)
+
+    df = pd.concat([casa, fora]).sort_index(kind='stable').reset_index(drop=True)
+    df['Res'] = pd.Categorical(df['Res'], categories=['V', 'E', 'D'])
+    for col in ['Temporada', 'Competição', 'Time', 'Adv']:
+        df[col] = df[col].astype('category')
+    return df
+
+
+@instrumentacao.medir('filtro')
+def indexar(df):
+    """
+    Tabela de offsets de uma base ordenada por Temporada/Competição/Rodada
+    (ver data.ordenar): {temporada: {competicao: (ini, fim)}}. Sem a coluna
+    Competição (escalações) a chave interna é None.
+    """
+    if df.empty or 'Temporada' not in df.columns:
+        return {}
+    chaves = ['Temporada', 'Competição'] if 'Competição' in df.columns else ['Temporada']
+    tamanhos = df.groupby(chaves, observed=True, sort=False, dropna=False).size()
+    fins = tamanhos.to_numpy().cumsum()
+
+    # Os offsets só valem se cada bloco for contíguo e as rodadas crescentes dentro dele.
+    # As quebras comparam códigos (factorize): nulos viram -1 e são iguais entre si
+    codigos = np.column_stack([pd.factorize(df[c])[0] for c in chaves])
+    quebras = np.ones(len(df), dtype=bool)
+    quebras[1:] = (codigos[1:] != codigos[:-1]).any(axis=1)
+    if quebras.sum() != len(tamanhos):
+        raise ValueError("Base fora de ordem: use data.ordenar antes de indexar.")
+    if 'Rodada' in df.columns:
+        rod = df['Rodada'].to_numpy()
+        if np.any((np.diff(rod) < 0) & ~quebras[1:]):
+            raise ValueError("Rodadas fora de ordem: use data.ordenar antes de indexar.")
+
+    indice = {}
+    for chave, fim, tam in zip(tamanhos.index, fins, tamanhos.to_numpy()):
+        chave = chave if isinstance(chave, tuple) else (chave,)
+        temp, comp = chave if len(chave) == 2 else (chave[0], None)
+        indice.setdefault(temp, {})[comp] = (int(fim - tam), int(fim))
+    return indice
+
+
+@instrumentacao.medir('processamento')
+def concatenar(partes, categorias=None):
+    """
+    pd.concat que mantém as colunas categóricas como categoria (o concat puro as
+    transforma em object quando as categorias diferem). Partes com as mesmas
+    categorias as mantêm; senão valem as de `categorias` ({coluna: categorias})
+    ou os valores presentes em ordem alfabética, como no astype('category').
+    """
+    partes = [p for p in partes if len(p)] or partes[:1]
+    colunas = [c for c in partes[0].columns if isinstance(partes[0][c].dtype, pd.CategoricalDtype)]
+    for c in colunas:
+        tipos = [p[c].dtype for p in partes if c in p.columns]
+        iguais = all(isinstance(t, pd.CategoricalDtype) and t.categories.equals(tipos[0].categories) for t in tipos)
+        if iguais and not (categorias and c in categorias):
             continue
+        if categorias and c in categorias:
+            novas = categorias[c]
+        else:
+            novas = pd.Index(np.concatenate([p[c].dropna().unique().astype(object) for p in partes
+                                             if c in p.columns])).unique().sort_values()
+        partes = [p.assign(**{c: p[c].astype('category').cat.set_categories(novas)}) if c in p.columns else p
+                  for p in partes]
+    return pd.concat(partes, ignore_index=True)
+
+
+@instrumentacao.medir('padronizacao')
+def normalizar_colunas_mistas(df):
+    """
+    Colunas com tipos misturados (ex.: número e texto) viram texto, pois o Arrow
+    não as aceita (snapshots, carga em blocos e modules.paralelo). Não altera
+    `df`: devolve uma cópia rasa só se houver o que converter.
+    """
+    mistas = {c: df[c].where(df[c].isna(), df[c].astype(str)) for c in df.columns[df.dtypes == object]
+              if pd.api.types.infer_dtype(df[c], skipna=True) in ('mixed', 'mixed-integer')}
+    return df.assign(**mistas) if mistas else df
+
+
+@instrumentacao.medir('filtro')
+def posicoes_filtro(df, temporada, competicao=None, r_ini=None, r_fim=None, indice=None):
+    """
+    Posições das linhas que atendem os filtros da sidebar, achadas por busca
+    binária nos blocos de utils.indexar (competicao=None pega todas). O índice
+    pode vir pronto (ex.: memorizado em analytics); senão é montado aqui.
+    """
+    blocos = (indexar(df) if indice is None else indice).get(temporada, {})
+    if competicao is not None:
+        blocos = {competicao: blocos[competicao]} if competicao in blocos else {}
+
+    rod = df['Rodada'].to_numpy() if 'Rodada' in df.columns else None
+    partes = []
+    for ini, fim in blocos.values():
+        a, b = ini, fim
+        if rod is not None:
+            if r_ini is not None:
+                a = ini + int(np.searchsorted(rod[ini:fim], r_ini, side='left'))
+            if r_fim is not None:
+                b = ini + int(np.searchsorted(rod[ini:fim], r_fim, side='right'))
+        if b > a:
+            partes.append(np.arange(a, b))
+    return np.concatenate(partes) if partes else np.empty(0, dtype=np.intp)
+
+
+@instrumentacao.medir('filtro')
+def rodadas_disponiveis(df, temporada, competicao=None, indice=None):
+    """Rodadas (ordenadas, sem repetição) de uma temporada, lidas direto dos blocos do índice."""
+    if 'Rodada' not in df.columns:
+        return np.empty(0, dtype=int)
+    rod = df['Rodada'].to_numpy()
+    return np.unique(rod[posicoes_filtro(df, temporada, competicao, indice=indice)])
+
+
+@instrumentacao.medir('filtro')
+def fatiar_atuacoes(df_atuacoes, temporada, competicao, r_ini, r_fim, indice=None):
+    """Recorta a tabela de atuações (competicao=None pega todas as competições)."""
+    if df_atuacoes is None or df_atuacoes.empty:
+        return pd.DataFrame()
+
+    pos = posicoes_filtro(df_atuacoes, temporada, competicao, r_ini, r_fim, indice=indice)
+    return df_atuacoes.take(pos).reset_index(drop=True)
+
+
+ESTATISTICAS_CLASSIFICACAO = ['Pontos', 'V', 'E', 'D', 'Pro', 'J']
+
+
+def _matriz_estatisticas(df_res):
+    """Uma linha por atuação com Pontos, V, E, D, Pro e J (resultados em one-hot)."""
+    res = df_res['Res'].to_numpy()
+    return np.column_stack([
+        df_res['Pts'].to_numpy(dtype=float), res == 'V', res == 'E', res == 'D',
+        df_res['Placar'].to_numpy(dtype=float), np.ones(len(df_res)),
+    ])
+
+
+@instrumentacao.medir('processamento')
+def resumo_por_time(df_res):
+    """
+    Pontos, V, E, D, Pro e J de cada time numa única passada vetorizada
+    (somas dos one-hot por time). Base da classificação e dos KPIs do Raio-X.
+    """
+    if df_res is None or df_res.empty:
+        return pd.DataFrame(columns=ESTATISTICAS_CLASSIFICACAO)
+
+    cod_time, times = pd.factorize(df_res['Time'], sort=True)
+    valores = _matriz_estatisticas(df_res)
+    somas = np.column_stack([np.bincount(cod_time, weights=valores[:, i], minlength=len(times))
+                             for i in range(valores.shape[1])])
+    tb = pd.DataFrame(somas, columns=ESTATISTICAS_CLASSIFICACAO, index=pd.Index(np.asarray(times), name='Time'))
+    for c in ['Pontos', 'V', 'E', 'D', 'J']:
+        tb[c] = tb[c].round().astype(int)
+    return tb
+
+
+@instrumentacao.medir('processamento')
+def acumular_classificacao(df_atuacoes, indice=None):
+    """
+    Acumulados por rodada de cada time, montados uma vez por Temporada/Competição:
+    {temporada: {competicao: (times, rodadas, acum)}}, onde acum[t, k] soma
+    Pontos, V, E, D, Pro e J das k primeiras rodadas (acum[:, 0] é zero).
+    """
+    if df_atuacoes is None or df_atuacoes.empty:
+        return {}
+
+    valores = _matriz_estatisticas(df_atuacoes)
+    rod = df_atuacoes['Rodada'].to_numpy()
+
+    acumulados = {}
+    indice = indexar(df_atuacoes) if indice is None else indice
+    for temp, blocos in indice.items():
+        for comp, (ini, fim) in blocos.items():
+            cod_time, times = pd.factorize(df_atuacoes['Time'].iloc[ini:fim])
+            rodadas, cod_rod = np.unique(rod[ini:fim], return_inverse=True)
 
-    return pd.DataFrame(lst)
+            por_rodada = np.zeros((len(times), len(rodadas) + 1, len(ESTATISTICAS_CLASSIFICACAO)))
+            np.add.at(por_rodada, (cod_time, cod_rod + 1), valores[ini:fim])
+            acumulados.setdefault(temp, {})[comp] = (np.asarray(times), rodadas, por_rodada.cumsum(axis=1))
+    return acumulados
 
 
-def filtrar_escalacoes(df_esc, temporada, r_ini, r_fim):
+def ordenar_classificacao(tb):
+    """
+    Acabamento de uma tabela somada por time (coluna Time e as
+    ESTATISTICAS_CLASSIFICACAO): contagens inteiras e ordem por Pontos, V e Pro.
+    Altera `tb`.
+    """
+    tb['Time'] = tb['Time'].astype(str)
+    tb['Pro'] = tb['Pro'].round(6)  # Remove o ruído de ponto flutuante das somas e subtrações
+    for c in ['Pontos', 'V', 'E', 'D', 'J']:
+        tb[c] = tb[c].round().astype(int)
+    return tb.sort_values(['Pontos', 'V', 'Pro'], ascending=[False, False, False]).reset_index(drop=True)
+
+
+@instrumentacao.medir('ranking')
+def classificacao(acumulados, temporada, competicao, r_ini, r_fim):
+    """
+    Classificação da janela r_ini..r_fim como diferença de duas linhas dos
+    acumulados de acumular_classificacao (custo proporcional ao número de
+    times, não de jogos). Já sai ordenada por Pontos, V e Pro.
+    """
+    blocos = acumulados.get(temporada, {})
+    if competicao is not None:
+        blocos = {competicao: blocos[competicao]} if competicao in blocos else {}
+
+    partes = []
+    for times, rodadas, acum in blocos.values():
+        k_ini = np.searchsorted(rodadas, r_ini, side='left')
+        k_fim = np.searchsorted(rodadas, r_fim, side='right')
+        partes.append(pd.DataFrame(acum[:, k_fim] - acum[:, k_ini], columns=ESTATISTICAS_CLASSIFICACAO,
+                                   index=pd.Index(times, name='Time')))
+    if not partes:
+        return pd.DataFrame()
+
+    # Em "Todas" o mesmo time soma as campanhas de cada competição
+    tb = pd.concat(partes).groupby(level='Time', sort=True).sum()
+    return ordenar_classificacao(tb[tb['J'] > 0].reset_index())
+
+
+
+@instrumentacao.medir('processamento')
+def raio_x_times(df_atuacoes, temporada, competicao, r_ini, r_fim, indice=None):
+    """
+    Raio-X de todos os times da janela de uma vez: {time: {'resumo': ..., 'hist': ...}}.
+    Memorizado pelo estado dos filtros (analytics); trocar de time no selectbox é só uma consulta.
+    """
+    df_res = fatiar_atuacoes(df_atuacoes, temporada, competicao, r_ini, r_fim, indice=indice)
+    if df_res.empty:
+        return {}
+
+    resumos = resumo_por_time(df_res).to_dict('index')
+
+    # Histórico já formatado para todos os times, do jogo mais recente ao mais antigo
+    df = df_res.assign(Time=df_res['Time'].astype(str)).sort_values(
+        ['Time', 'Rodada'], ascending=[True, False], kind='stable')
+    hist = pd.DataFrame({
+        'Rodada': df['Rodada'].astype(int).astype(str),
+        '': df['Res'].map({'V': '✅', 'E': '➖', 'D': '❌'}).astype(str),
+        'Resultado': df['Res'].map({'V': 'VITÓRIA', 'E': 'EMPATE', 'D': 'DERROTA'}).astype(str),
+        'Sua Pont.': np.char.mod('%.2f', df['Placar'].to_numpy()),
+        'Pont. Adv.': np.char.mod('%.2f', df['Placar_Adv'].to_numpy()),
+        'Adversário': df['Adv'].astype(str),
+    })
+
+    return {time: {'resumo': resumos[time], 'hist': h.reset_index(drop=True)}
+            for time, h in hist.groupby(df['Time'].to_numpy(), sort=True)}
+
+
+@instrumentacao.medir('filtro')
+def filtrar_escalacoes(df_esc, temporada, r_ini, r_fim, indice=None):
     """Filtra as escalações por temporada e rodada."""
     if df_esc is None or df_esc.empty: return pd.DataFrame()
 
     try:
-        df = df_esc.copy()
-        df = df[df['Temporada'] == temporada]
-        if 'Rodada' in df.columns:
-            df = df[(df['Rodada'] >= r_ini) & (df['Rodada'] <= r_fim)]
-        return df
+        return df_esc.take(posicoes_filtro(df_esc, temporada, None, r_ini, r_fim, indice=indice))
     except:
         return pd.DataFrame()
 
 
-def gerar_ranking_lendas(df_camp, temporada, r_ini, r_fim):
+def _contem(serie, texto):
+    """str.contains sem diferenciar maiúsculas; em categorias a busca roda só nos rótulos, não em cada linha."""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        marca = serie.cat.categories.astype(str).str.contains(texto, case=False, na=False)
+        return np.append(marca, False)[serie.cat.codes.to_numpy()]  # código -1 (nulo) cai no False
+    return serie.astype(str).str.contains(texto, case=False, na=False).to_numpy()
+
+
+CHAVES_CUBO = ['Temporada', 'Rodada', 'Time', 'Posição', 'Atleta']
+
+
+@instrumentacao.medir('processamento')
+def cubo_escalacoes(df_esc):
     """
-    Gera dois dataframes de 'Maiores Pontuadores da Rodada' (Mitadas).
+    Contagens das escalações por (Temporada, Rodada, Time, Posição, Atleta), com
+    quantas delas foram de capitão. Montado uma vez por base (analytics); fica
+    ordenado por Temporada/Rodada, então pode ser recortado com filtrar_escalacoes.
     """
-    if df_camp is None or df_camp.empty:
-        return pd.DataFrame(), pd.DataFrame()
+    if df_esc is None or df_esc.empty or any(c not in df_esc.columns for c in CHAVES_CUBO):
+        return pd.DataFrame(columns=CHAVES_CUBO + ['Escalações', 'Vezes_Capitao'])
 
-    # 1. Filtro Inicial
-    df = df_camp.copy()
-    df = df[df['Temporada'] == temporada]
-    if 'Rodada' in df.columns:
-        df = df[(df['Rodada'] >= r_ini) & (df['Rodada'] <= r_fim)]
+    cap = df_esc['Capitao'] if 'Capitao' in df_esc.columns else pd.Series(np.nan, index=df_esc.index)
+    e_cap = _contem(cap, 'CAP')
 
-    # 2. Transforma em Lista Vertical
-    lista_atuacoes = []
-    for _, r in df.iterrows():
-        try:
-            # Garante float
-            cm = 'Pontuação' if 'Pontuação' in r else 'Pontuacao_Mandante'
-            cv = 'Pontuação.1' if 'Pontuação.1' in r else 'Pontuacao_Visitante'
-            if cm not in r: cm = 'Pontuacao_Mandante'
-            if cv not in r: cv = 'Pontuacao_Visitante'
-
-            pm = float(r[cm]) if pd.notnull(r[cm]) else 0.0
-            pv = float(r[cv]) if pd.notnull(r[cv]) else 0.0
-
-            comp = r.get('Competição', 'Geral')
-            rod = r['Rodada']
-
-            lista_atuacoes.append({'Time': r['Mandante'], 'Pontuação': pm, 'Rodada': rod, 'Adversário': r['Visitante'],
-                                   'Competição': comp})
-            lista_atuacoes.append({'Time': r['Visitante'], 'Pontuação': pv, 'Rodada': rod, 'Adversário': r['Mandante'],
-                                   'Competição': comp})
-        except:
-            continue
+    cubo = (df_esc[CHAVES_CUBO].assign(Escalações=1, Vezes_Capitao=e_cap.astype(int))
+            .groupby(CHAVES_CUBO, observed=True, sort=True)[['Escalações', 'Vezes_Capitao']].sum()
+            .reset_index())
+    return cubo
 
-    df_atuacoes = pd.DataFrame(lista_atuacoes)
-    if df_atuacoes.empty:
+
+@instrumentacao.medir('ranking')
+def top_k(df, coluna, k, unicos=None):
+    """
+    As k maiores linhas por `coluna` (ou os k maiores valores, se df for uma Series),
+    em ordem decrescente, sem ordenar a base inteira: seleção parcial com nlargest
+    e ordenação só dos k escolhidos, O(n + k log k). Com `unicos`, fica só a melhor
+    linha de cada combinação dessas colunas, como um sort + drop_duplicates.
+    Empates seguem a ordem original das linhas.
+    """
+    if df.empty:
+        return df
+    if unicos:
+        # Melhor linha de cada grupo (idxmax pega a primeira em caso de empate)
+        melhores = df.groupby(unicos, observed=True, sort=False)[coluna].idxmax().to_numpy()
+        df = df.iloc[np.sort(df.index.get_indexer(melhores))]
+
+    escolhidos = df.nlargest(k, keep='first') if isinstance(df, pd.Series) else df.nlargest(k, coluna, keep='first')
+    escolhidos = df.iloc[np.sort(df.index.get_indexer(escolhidos.index))]
+    if isinstance(escolhidos, pd.Series):
+        return escolhidos.sort_values(ascending=False, kind='stable')
+    return escolhidos.sort_values(coluna, ascending=False, kind='stable')
+
+
+@instrumentacao.medir('ranking')
+def resumo_escalacoes(cubo, limite_queridinhos=50, limite_capitaes=30, limite_posicao=5):
+    """
+    Tudo o que a aba Top Escalações mostra para um recorte do cubo, calculado de
+    uma vez: treemaps dos mais escalados e dos capitães, lista de times e o top
+    de cada posição no geral e por time ({'geral': {pos: df}, 'por_time': {time: {pos: df}}}).
+    """
+    if cubo is None or cubo.empty:
+        return {'queridinhos': pd.DataFrame(), 'capitaes': pd.DataFrame(), 'times': [],
+                'geral': {}, 'por_time': {}}
+
+    queridinhos = cubo.groupby(['Atleta', 'Posição'], observed=True)['Escalações'].sum().reset_index()
+    queridinhos = top_k(queridinhos, 'Escalações', limite_queridinhos)
+
+    capitaes = cubo.groupby('Atleta', observed=True)['Vezes_Capitao'].sum()
+    capitaes = top_k(capitaes[capitaes > 0], None, limite_capitaes).reset_index()
+    capitaes.columns = ['Atleta', 'Vezes']
+
+    def tops(chaves):
+        # Ordenação estável: empates seguem a ordem dos atletas, como no top_k
+        somas = cubo.groupby(chaves + ['Atleta'], observed=True)['Escalações'].sum().reset_index()
+        somas = somas.sort_values(chaves + ['Escalações'], ascending=[True] * len(chaves) + [False])
+        somas = somas.groupby(chaves, observed=True).head(limite_posicao)
+        return {chave: g[['Atleta', 'Escalações']].set_axis(['Atleta', 'Qtd'], axis=1).reset_index(drop=True)
+                for chave, g in somas.groupby(chaves[0] if len(chaves) == 1 else chaves, observed=True, sort=False)}
+
+    por_time = {}
+    for (time, pos), top in tops(['Time', 'Posição']).items():
+        por_time.setdefault(time, {})[pos] = top
+
+    return {'queridinhos': queridinhos, 'capitaes': capitaes, 'times': sorted(cubo['Time'].unique()),
+            'geral': tops(['Posição']), 'por_time': por_time}
+
+
+COLUNAS_CAMPEOES = ['Temporada', 'Competição', 'Rodada', 'Time', 'Pontuação', 'Adversário', 'Rei']
+
+
+@instrumentacao.medir('ranking')
+def campeoes_rodada(df_atuacoes):
+    """
+    Maiores pontuadores de cada rodada de cada Liga (empates mantidos), montado uma
+    vez por base (analytics). A coluna Rei marca quem também foi o maior entre todas as Ligas
+    da temporada naquela rodada. Fica ordenado por Temporada/Competição/Rodada.
+    """
+    if df_atuacoes is None or df_atuacoes.empty:
+        return pd.DataFrame(columns=COLUNAS_CAMPEOES)
+
+    df = df_atuacoes[_contem(df_atuacoes['Competição'], 'Liga')]
+    df = df.rename(columns={'Placar': 'Pontuação', 'Adv': 'Adversário'})
+
+    # O Rei de uma rodada é sempre campeão da própria liga: basta comparar os campeões
+    max_liga = df.groupby(['Temporada', 'Competição', 'Rodada'], observed=True)['Pontuação'].transform('max')
+    df = df[df['Pontuação'] == max_liga]
+    max_geral = df.groupby(['Temporada', 'Rodada'], observed=True)['Pontuação'].transform('max')
+    df = df.assign(Rei=df['Pontuação'] == max_geral)
+    return df[COLUNAS_CAMPEOES].reset_index(drop=True)
+
+
+@instrumentacao.medir('ranking')
+def gerar_ranking_lendas(df_atuacoes, temporada, r_ini, r_fim, limite=50, indice=None, campeoes=None):
+    """
+    Gera os dataframes de 'Maiores Pontuadores da Rodada' (Mitadas) a partir da
+    tabela de atuações (ver gerar_atuacoes): o Hall da Fama geral, só com as
+    `limite` maiores pontuações, e os campeões de cada rodada por Liga (com Rei).
+    O índice e a tabela de campeões podem vir prontos (ver analytics).
+    """
+    # 1. Recorte da temporada e das rodadas (todas as competições)
+    df = fatiar_atuacoes(df_atuacoes, temporada, None, r_ini, r_fim, indice=indice)
+    if df.empty:
         return pd.DataFrame(), pd.DataFrame()
 
+    # 2. Lista Vertical no formato do Hall da Fama
+    df_atuacoes_temp = df.rename(columns={'Placar': 'Pontuação', 'Adv': 'Adversário'})[
+        ['Time', 'Pontuação', 'Rodada', 'Adversário', 'Competição']]
+
     # 3. DataFrame GERAL (Removemos duplicatas aqui pois é um Hall da Fama único)
-    df_geral = df_atuacoes.sort_values('Pontuação', ascending=False).drop_duplicates(subset=['Time', 'Rodada'])
+    df_geral = top_k(df_atuacoes_temp, 'Pontuação', limite, unicos=['Time', 'Rodada'])
 
-    # 4. DataFrame LIGAS (Mantemos duplicatas de times em ligas diferentes para permitir o filtro)
-    df_ligas = df_atuacoes[df_atuacoes['Competição'].str.contains('Liga', case=False, na=False)]
-    df_ligas = df_ligas.sort_values('Pontuação', ascending=False)
-    # Nota: NÃO fazemos drop_duplicates aqui ainda, faremos na visualização se necessário.
+    # 4. CAMPEÕES POR LIGA: recorte da tabela pré-calculada (mantém times repetidos em ligas diferentes)
+    df_campeoes = campeoes_rodada(df_atuacoes) if campeoes is None else campeoes
+    df_campeoes = df_campeoes.take(posicoes_filtro(df_campeoes, temporada, None, r_ini, r_fim))
 
-    return df_geral, df_ligas
+    return df_geral, df_campeoes.reset_index(drop=True)
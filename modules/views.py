@@ -2,96 +2,131 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 
-
-def exibir_tabela_liga(df_res, sel_comp):
+from modules import instrumentacao, utils
+from modules.cache import CacheLRU, memorizar_por_assinatura
+
+# --- TABELAS PRONTAS PARA EXIBIÇÃO ---
+# Formatação, destaque e alinhamento ficam no column_config do st.dataframe (o
+# navegador desenha, sem Styler célula a célula). A tabela de exibição e o
+# column_config de cada resultado são montados uma vez, pela assinatura dele.
+_cache_tabelas = CacheLRU(128, 64 * 1024 * 1024)
+_preparada = memorizar_por_assinatura(_cache_tabelas, 'render')
+
+
+def _texto(**kwargs):
+    return st.column_config.TextColumn(alignment='center', **kwargs)
+
+
+def _numero(formato, **kwargs):
+    return st.column_config.NumberColumn(format=formato, alignment='center', **kwargs)
+
+
+def _barra(serie, cor, formato):
+    """Barra de progresso no lugar do background_gradient: vai do menor ao maior valor da coluna."""
+    mi, ma = float(serie.min()), float(serie.max())
+    if ma <= mi:
+        mi = ma - 1
+    return st.column_config.ProgressColumn(format=formato, min_value=mi, max_value=ma, color=cor)
+
+
+def selecao_persistente(rotulo, opcoes, chave, index=0):
+    """
+    selectbox que lembra a escolha em st.session_state[chave], fora do estado do
+    widget (que usa a chave f"{chave}_widget"). Com as abas preguiçosas o widget
+    de uma aba fechada não é desenhado e o Streamlit descarta o estado dele; ao
+    reabrir, a escolha guardada volta como `index` (se ainda estiver entre as opções).
+    """
+    opcoes = list(opcoes)
+    guardada = st.session_state.get(chave)
+    escolha = st.selectbox(rotulo, opcoes, index=opcoes.index(guardada) if guardada in opcoes else index,
+                           key=f"{chave}_widget")
+    st.session_state[chave] = escolha
+    return escolha
+
+
+@_preparada
+def _tabela_liga(tb):
+    df_show = tb[['Time', 'Pontos', 'V', 'E', 'D', 'Pro', 'J']].rename(columns={'Pro': 'Pts Cartola', 'J': 'Jogos'})
+    df_show.insert(0, 'Pos', [f"{i}º" for i in range(1, len(df_show) + 1)])
+    config = {
+        'Pos': _texto(), 'Time': _texto(), 'Pontos': _barra(df_show['Pontos'], 'green', '%d'),
+        'V': _numero('%d'), 'E': _numero('%d'), 'D': _numero('%d'),
+        'Pts Cartola': _numero('%.2f'), 'Jogos': _numero('%d'),
+    }
+    return df_show, config
+
+
+@instrumentacao.medir('render')
+def exibir_tabela_liga(tb, sel_comp):
+    """Recebe a classificação já agregada e ordenada (analytics.classificacao) e só desenha."""
     st.subheader(f"Classificação: {sel_comp}")
-    if df_res.empty:
+    if tb.empty:
         st.warning("Sem jogos.")
         return
 
-    df_res['Pts'] = pd.to_numeric(df_res['Pts'], errors='coerce').fillna(0)
-    df_res['Placar'] = pd.to_numeric(df_res['Placar'], errors='coerce').fillna(0)
+    df_show, config = _tabela_liga(tb)
+    st.dataframe(df_show, column_config=config, width="stretch", hide_index=True, height=600)
+
 
-    tb = df_res.groupby('Time').agg(
-        Pontos=('Pts', 'sum'), V=('Res', lambda x: (x == 'V').sum()),
-        E=('Res', lambda x: (x == 'E').sum()), D=('Res', lambda x: (x == 'D').sum()),
-        Pro=('Placar', 'sum'), J=('Rodada', 'count')
-    ).reset_index().sort_values(['Pontos', 'V', 'Pro'], ascending=[False, False, False]).reset_index(drop=True)
+CORES_RESULTADO = {'VITÓRIA': 'green', 'EMPATE': 'orange', 'DERROTA': 'red'}
 
-    tb.index += 1
-    tb['Pos'] = tb.index.astype(str) + 'º'
-    for c in ['V', 'E', 'D', 'J']: tb[c] = tb[c].astype(str)
 
-    st.dataframe(
-        tb[['Pos', 'Time', 'Pontos', 'V', 'E', 'D', 'Pro', 'J']].rename(columns={'Pro': 'Pts Cartola', 'J': 'Jogos'})
-        .style.format({'Pts Cartola': '{:.2f}'})
-        .background_gradient(subset=['Pontos'], cmap='Greens')
-        .set_properties(**{'text-align': 'center'}),
-        use_container_width=True, hide_index=True, height=600
-    )
+@_preparada
+def _tabela_historico(hist):
+    # O resultado vira uma "pílula" colorida (MultiselectColumn só de leitura)
+    df_show = hist.assign(Resultado=[[r] for r in hist['Resultado']])
+    config = {
+        'Rodada': _texto(), '': _texto(), 'Sua Pont.': _texto(), 'Pont. Adv.': _texto(),
+        'Resultado': st.column_config.MultiselectColumn(
+            options=list(CORES_RESULTADO), color=list(CORES_RESULTADO.values())),
+    }
+    return df_show, config
 
 
-def exibir_raio_x(df_res):
+@instrumentacao.medir('render')
+def exibir_raio_x(raio_x):
+    """Recebe o Raio-X já calculado para todos os times (analytics.raio_x)."""
     c1, c2 = st.columns([1, 3])
     with c1:
-        times = sorted(df_res['Time'].unique())
-        t_sel = st.selectbox("Cartoleiro:", times)
+        times = sorted(raio_x)
+        t_sel = selecao_persistente("Cartoleiro:", times, 'sel_raio_x_time')
     with c2:
-        dft = df_res[df_res['Time'] == t_sel].sort_values('Rodada', ascending=False)
+        dados = raio_x.get(t_sel)
+        resumo = dados['resumo'] if dados else dict.fromkeys(utils.ESTATISTICAS_CLASSIFICACAO, 0)
+        hist = dados['hist'] if dados else pd.DataFrame(
+            columns=['Rodada', '', 'Resultado', 'Sua Pont.', 'Pont. Adv.', 'Adversário'])
 
         k1, k2, k3, k4 = st.columns(4)
-        k1.metric("Pontos", dft['Pts'].sum())
-        k2.metric("Média", f"{dft['Placar'].mean():.2f}")
-        k3.metric("Jogos", len(dft))
-        apr = (dft['Pts'].sum() / (len(dft) * 3)) * 100 if len(dft) > 0 else 0
+        k1.metric("Pontos", resumo['Pontos'])
+        k2.metric("Média", f"{resumo['Pro'] / resumo['J'] if resumo['J'] else 0:.2f}")
+        k3.metric("Jogos", resumo['J'])
+        apr = (resumo['Pontos'] / (resumo['J'] * 3)) * 100 if resumo['J'] > 0 else 0
         k4.metric("Aprov.", f"{apr:.1f}%")
         st.divider()
 
-        vitorias = len(dft[dft['Res'] == 'V'])
-        empates = len(dft[dft['Res'] == 'E'])
-        derrotas = len(dft[dft['Res'] == 'D'])
         j1, j2, j3 = st.columns(3)
-        j1.metric("✅ Vitórias", vitorias)
-        j2.metric("➖ Empates", empates)
-        j3.metric("❌ Derrotas", derrotas)
+        j1.metric("✅ Vitórias", resumo['V'])
+        j2.metric("➖ Empates", resumo['E'])
+        j3.metric("❌ Derrotas", resumo['D'])
         st.divider()
 
         st.markdown("#### 📜 Histórico")
-        hist = dft[['Rodada', 'Res', 'Placar', 'Placar_Adv', 'Adv']].copy()
-        hist['Icone'] = hist['Res'].map({'V': '✅', 'E': '➖', 'D': '❌'})
-        hist['Status'] = hist['Res'].map({'V': 'VITÓRIA', 'E': 'EMPATE', 'D': 'DERROTA'})
-
-        hist['Rodada'] = hist['Rodada'].apply(lambda x: f"{x:.0f}")
-        hist['Sua Pont.'] = hist['Placar'].apply(lambda x: f"{x:.2f}")
-        hist['Pont. Adv.'] = hist['Placar_Adv'].apply(lambda x: f"{x:.2f}")
-
-        def colorir(
-                v): return 'color: green; font-weight: bold;' if v == 'VITÓRIA' else 'color: red; font-weight: bold;' if v == 'DERROTA' else 'color: orange; font-weight: bold;'
-
-        st.dataframe(
-            hist[['Rodada', 'Icone', 'Status', 'Sua Pont.', 'Pont. Adv.', 'Adv']].rename(
-                columns={'Icone': '', 'Status': 'Resultado', 'Adv': 'Adversário'})
-            .style.applymap(colorir, subset=['Resultado'])
-            .set_properties(subset=['Rodada', '', 'Resultado', 'Sua Pont.', 'Pont. Adv.'], **{'text-align': 'center'}),
-            hide_index=True, use_container_width=True
-        )
 
+        df_show, config = _tabela_historico(hist)
+        st.dataframe(df_show, column_config=config, hide_index=True, width="stretch")
 
-def exibir_top_escalacoes(df_esc_ok, t_sel_aba2):
-    if df_esc_ok.empty:
+
+@instrumentacao.medir('render')
+def exibir_top_escalacoes(resumo, t_sel_aba2):
+    """Recebe o painel já calculado para a rodada (analytics.top_escalacoes) e só desenha."""
+    if not resumo['times']:
         st.info("⚠️ Sem dados de escalações para o período selecionado.")
         return
 
     st.markdown(f"### 🎨 Painel Visual")
 
-    df_tree = df_esc_ok.groupby(['Atleta', 'Posição']).size().reset_index(name='Escalações').sort_values('Escalações',
-                                                                                                         ascending=False).head(
-        50)
-
-    df_cap_tree = df_esc_ok[df_esc_ok['Capitao'].astype(str).str.contains('CAP', case=False, na=False)]
-    df_cap_tree = df_cap_tree['Atleta'].value_counts().reset_index()
-    df_cap_tree.columns = ['Atleta', 'Vezes']
-    df_cap_tree = df_cap_tree.head(30)
+    df_tree = resumo['queridinhos']
+    df_cap_tree = resumo['capitaes']
 
     st.subheader("🔥 Os Queridinhos")
     if not df_tree.empty:
@@ -116,54 +151,104 @@ def exibir_top_escalacoes(df_esc_ok, t_sel_aba2):
     st.divider()
     st.markdown("### ⚔️ Comparativo Detalhado")
 
-    times_esc = sorted(df_esc_ok['Time'].unique())
+    times_esc = resumo['times']
     idx_t = times_esc.index(t_sel_aba2) if t_sel_aba2 in times_esc else 0
-    time_foco = st.selectbox("Analisar Time:", times_esc, index=idx_t)
+    time_foco = selecao_persistente("Analisar Time:", times_esc, 'sel_escalacoes_time', index=idx_t)
 
     st.divider()
 
-    def get_top5(df_input, posicao):
-        df_pos = df_input[df_input['Posição'] == posicao]
-        top = df_pos['Atleta'].value_counts().reset_index()
-        top.columns = ['Atleta', 'Qtd']
-        top = top.head(5)
-        top['Qtd'] = top['Qtd'].astype(str)
-        return top
+    def get_top5(tops, posicao):
+        return tops.get(posicao, pd.DataFrame())
+
+    config_top5 = {'Atleta': _texto(), 'Qtd': _numero('%d')}
 
     posicoes = ['Goleiro', 'Lateral', 'Zagueiro', 'Meia', 'Atacante', 'Técnico']
-    df_time_foco = df_esc_ok[df_esc_ok['Time'] == time_foco]
-    df_geral = df_esc_ok.copy()
+    tops_time_foco = resumo['por_time'].get(time_foco, {})
+    tops_geral = resumo['geral']
 
     for pos in posicoes:
         c1, c2 = st.columns(2)
         with c1:
             st.markdown(f"**{pos}s - {time_foco}**")
-            df_show = get_top5(df_time_foco, pos)
+            df_show = get_top5(tops_time_foco, pos)
             if not df_show.empty:
-                st.dataframe(df_show.style.set_properties(**{'text-align': 'center'}), use_container_width=True,
-                             hide_index=True)
+                st.dataframe(df_show, column_config=config_top5, width="stretch", hide_index=True)
             else:
                 st.caption("Nenhum escalado.")
         with c2:
             st.markdown(f"**{pos}s - Geral (Temporada)**")
-            df_show_g = get_top5(df_geral, pos)
+            df_show_g = get_top5(tops_geral, pos)
             if not df_show_g.empty:
-                st.dataframe(df_show_g.style.set_properties(**{'text-align': 'center'}), use_container_width=True,
-                             hide_index=True)
+                st.dataframe(df_show_g, column_config=config_top5, width="stretch", hide_index=True)
         st.divider()
 
 
-def exibir_aba_lendas(df_geral, df_ligas):
-    """Exibe Hall da Fama, Campeões por Liga e Rei da Rodada (Geral)."""
+@_preparada
+def _tabela_hall_da_fama(df_geral):
+    df_show = df_geral.head(50)[['Time', 'Pontuação', 'Rodada', 'Competição', 'Adversário']].reset_index(drop=True)
+    pos = [f"{i}º" for i in range(1, len(df_show) + 1)]
+
+    # Ícones de medalhas para top 3
+    for i, medalha in enumerate(['🥇', '🥈', '🥉'][:len(pos)]):
+        pos[i] = f"{medalha} {pos[i]}"
+    df_show.insert(0, 'Pos', pos)
+
+    config = {'Pos': _texto(), 'Time': _texto(), 'Pontuação': _barra(df_show['Pontuação'], 'green', '%.2f'),
+              'Rodada': _numero('%d'), 'Competição': _texto(), 'Adversário': _texto()}
+    return df_show, config
+
+
+@_preparada
+def _tabela_campeoes_liga(df_campeoes, liga):
+    df_liga = df_campeoes[df_campeoes['Competição'] == liga]
+    df_show = df_liga.assign(**{'🥇': '🏆'})[['Rodada', '🥇', 'Time', 'Pontuação', 'Adversário']]
+    config = {'Rodada': _numero('%d'), '🥇': _texto(), 'Time': _texto(),
+              'Pontuação': _barra(df_show['Pontuação'], 'orange', '%.2f'), 'Adversário': _texto()}
+    return df_show, config
+
+
+@_preparada
+def _tabela_reis(df_campeoes):
+    # Os reis são os campeões marcados como maiores entre todas as Ligas da rodada
+    df_reis = df_campeoes[df_campeoes['Rei']].sort_values('Rodada', kind='stable')
+    df_show = df_reis.assign(**{'👑': '👑'})[['Rodada', '👑', 'Time', 'Pontuação', 'Competição', 'Adversário']]
+    config = {'Rodada': _numero('%d'), '👑': _texto(), 'Time': _texto(),
+              'Pontuação': _barra(df_show['Pontuação'], 'red', '%.2f'),  # Vermelho real para destaque
+              'Competição': _texto(), 'Adversário': _texto()}
+    return df_show, config
+
+
+@_preparada
+def _tabela_classificacao_historica(tb):
+    df_show, config = _tabela_liga(tb)
+    df_show = df_show.assign(Temporadas=tb['Temporadas'].to_numpy())
+    return df_show, {**config, 'Temporadas': _numero('%d')}
+
+
+@_preparada
+def _tabela_hall_historico(hall):
+    df_show, config = _tabela_hall_da_fama(hall)
+    df_show = df_show.copy()  # A tabela do Hall da Fama é compartilhada pelo cache
+    df_show.insert(2, 'Temporada', hall.head(50)['Temporada'].astype(str).to_numpy())
+    return df_show, {**config, 'Temporada': _texto()}
+
+
+@instrumentacao.medir('render')
+def exibir_aba_lendas(df_geral, df_campeoes, carregar_historico=None):
+    """Exibe Hall da Fama, Campeões por Liga e Rei da Rodada (Geral).
+    Os campeões e reis já vêm calculados (analytics.lendas). O histórico de
+    todas as temporadas, (classificação, hall), só é pedido a
+    `carregar_historico` (ex.: analytics.historico) com a sub-aba aberta."""
 
     st.markdown("### 🏅 Hall da Fama & Campeões")
 
-    # Criamos 3 abas agora
-    tab_l1, tab_l2, tab_l3 = st.tabs([
+    # Criamos 4 abas agora
+    tab_l1, tab_l2, tab_l3, tab_l4 = st.tabs([
         "🌍 Ranking Geral (Top Mitadas)", 
         "🏆 Campeões da Rodada (Por Liga)",
-        "👑 Rei da Rodada (Geral)"
-    ])
+        "👑 Rei da Rodada (Geral)",
+        "📜 Todas as Temporadas"
+    ], key="aba_lendas", on_change="rerun")
 
     # --- ABA 1: Ranking Geral (Hall da Fama) ---
     with tab_l1:
@@ -171,92 +256,49 @@ def exibir_aba_lendas(df_geral, df_ligas):
         if df_geral.empty:
             st.info("Nenhum registro encontrado.")
         else:
-            df_show = df_geral.head(50).copy()
-            df_show.reset_index(drop=True, inplace=True)
-            df_show.index += 1
-            df_show['Pos'] = df_show.index.astype(str) + 'º'
-
-            # Ícones de medalhas para top 3
-            if len(df_show) >= 1: df_show.loc[1, 'Pos'] = '🥇 1º'
-            if len(df_show) >= 2: df_show.loc[2, 'Pos'] = '🥈 2º'
-            if len(df_show) >= 3: df_show.loc[3, 'Pos'] = '🥉 3º'
-
-            df_show['Rodada'] = df_show['Rodada'].astype(int).astype(str)
-
-            st.dataframe(
-                df_show[['Pos', 'Time', 'Pontuação', 'Rodada', 'Competição', 'Adversário']]
-                .style.format({'Pontuação': '{:.2f}'})
-                .background_gradient(subset=['Pontuação'], cmap='Greens')
-                .set_properties(**{'text-align': 'center'}),
-                use_container_width=True, hide_index=True
-            )
+            df_show, config = _tabela_hall_da_fama(df_geral)
+            st.dataframe(df_show, column_config=config, width="stretch", hide_index=True)
 
     # --- ABA 2: Campeões da Rodada (Por Liga Específica) ---
     with tab_l2:
         st.caption("Veja quem foi o maior pontuador de cada rodada dentro de uma liga específica.")
 
-        if df_ligas.empty:
+        if df_campeoes.empty:
             st.info("Nenhuma competição do tipo 'Liga' encontrada.")
         else:
-            ligas_disponiveis = sorted(df_ligas['Competição'].unique())
-            liga_sel = st.selectbox("Selecione a Liga para visualizar:", ligas_disponiveis)
+            ligas_disponiveis = sorted(df_campeoes['Competição'].unique())
+            liga_sel = selecao_persistente("Selecione a Liga para visualizar:", ligas_disponiveis, 'sel_lendas_liga')
 
-            df_liga_atual = df_ligas[df_ligas['Competição'] == liga_sel].copy()
+            df_show, config = _tabela_campeoes_liga(df_campeoes, liga_sel)
 
-            if df_liga_atual.empty:
+            if df_show.empty:
                 st.warning("Sem dados para esta liga.")
             else:
-                df_liga_atual['Rodada'] = pd.to_numeric(df_liga_atual['Rodada'], errors='coerce')
-                
-                # Pega a pontuação máxima de cada rodada nessa liga
-                max_pts = df_liga_atual.groupby('Rodada')['Pontuação'].transform('max')
-                df_campeoes = df_liga_atual[df_liga_atual['Pontuação'] == max_pts]
-                
-                df_campeoes = df_campeoes.sort_values('Rodada')
-                df_campeoes['Rodada'] = df_campeoes['Rodada'].astype(int).astype(str)
-                df_campeoes['🥇'] = '🏆'
-
-                st.dataframe(
-                    df_campeoes[['Rodada', '🥇', 'Time', 'Pontuação', 'Adversário']]
-                    .style.format({'Pontuação': '{:.2f}'})
-                    .background_gradient(subset=['Pontuação'], cmap='Oranges')
-                    .set_properties(**{'text-align': 'center'}),
-                    use_container_width=True, hide_index=True
-                )
+                st.dataframe(df_show, column_config=config, width="stretch", hide_index=True)
 
     # --- ABA 3: Rei da Rodada (O Maior entre TODAS as Ligas) ---
     with tab_l3:
         st.caption("Quem foi o MELHOR de todos na rodada? Compara todas as ligas e mostra o maior pontuador absoluto.")
         
-        if df_ligas.empty:
+        if df_campeoes.empty:
             st.info("Sem dados de ligas para comparar.")
         else:
-            # 1. Filtra para garantir que só temos "Ligas" (Caso tenha passado sujeira)
-            # O filtro é case-insensitive (pega 'Liga', 'liga', 'LIGA')
-            df_reis = df_ligas[df_ligas['Competição'].str.contains('Liga', case=False, na=False)].copy()
-            
-            if df_reis.empty:
-                 st.warning("Nenhuma competição com nome 'Liga' encontrada.")
-            else:
-                # 2. Garante que Rodada é número
-                df_reis['Rodada'] = pd.to_numeric(df_reis['Rodada'], errors='coerce')
-
-                # 3. Mágica: Agrupa por Rodada e descobre o MAX global (entre todas as ligas)
-                max_pts_global = df_reis.groupby('Rodada')['Pontuação'].transform('max')
-                
-                # 4. Mantém apenas as linhas que igualam esse máximo
-                df_reis_final = df_reis[df_reis['Pontuação'] == max_pts_global].copy()
-
-                # 5. Ordenação e Formatação
-                df_reis_final = df_reis_final.sort_values('Rodada')
-                df_reis_final['Rodada'] = df_reis_final['Rodada'].astype(int).astype(str)
-                df_reis_final['👑'] = '👑' # Ícone de Rei
-
-                # Mostramos também a coluna "Competição" para saber de qual Liga o Rei veio
-                st.dataframe(
-                    df_reis_final[['Rodada', '👑', 'Time', 'Pontuação', 'Competição', 'Adversário']]
-                    .style.format({'Pontuação': '{:.2f}'})
-                    .background_gradient(subset=['Pontuação'], cmap='Reds') # Vermelho real para destaque
-                    .set_properties(**{'text-align': 'center'}),
-                    use_container_width=True, hide_index=True
-                )
+            # Mostramos também a coluna "Competição" para saber de qual Liga o Rei veio
+            df_show, config = _tabela_reis(df_campeoes)
+            st.dataframe(df_show, column_config=config, width="stretch", hide_index=True)
+
+    # --- ABA 4: Histórico (todas as temporadas somadas), calculado só com a aba aberta ---
+    if not tab_l4.open:
+        return
+    with tab_l4:
+        tb_hist, hall_hist = carregar_historico() if carregar_historico else (pd.DataFrame(), pd.DataFrame())
+        if tb_hist.empty:
+            st.info("Nenhum registro encontrado.")
+        else:
+            st.caption("Campanhas de todas as temporadas somadas, sem filtro de rodadas.")
+            df_show, config = _tabela_classificacao_historica(tb_hist)
+            st.dataframe(df_show, column_config=config, width="stretch", hide_index=True, height=600)
+
+            st.markdown("##### 🌍 Maiores Mitadas de Todos os Tempos")
+            df_show, config = _tabela_hall_historico(hall_hist)
+            st.dataframe(df_show, column_config=config, width="stretch", hide_index=True)